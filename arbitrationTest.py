@@ -1,6 +1,9 @@
+import random
 import unittest
-from core.goalModule import Goal, linear_urgency, curiosity_utility, safety_utility
-from core.arbitrator import GoalArbitrator
+from core.goalModule import Goal, ConstantUtilityGoal, linear_urgency, curiosity_utility, safety_utility
+from core.arbitrator import GoalArbitrator, _nash_best_response, _nash_rank_indicators
+from core.shared_types import Trait, EXPLORATORY, RISK_AVERSE
+from core.state import CognitiveState
 
 class TestGoalArbitrator(unittest.TestCase):
 
@@ -17,11 +20,263 @@ class TestGoalArbitrator(unittest.TestCase):
         probs = arb.softmax(values)
         self.assertAlmostEqual(sum(probs), 1.0)
 
+    def test_softmax_writes_into_out_buffer(self):
+        arb = GoalArbitrator(temperature=0.5)
+        out = [0.0, 0.0, 0.0]
+        probs = arb.softmax([0.2, 0.5, 0.1], out=out)
+        self.assertIs(probs, out)
+        self.assertEqual(out, arb.softmax([0.2, 0.5, 0.1]))
+
+    def test_temperature_update_rescales_softmax(self):
+        values = [1.0, 2.0]
+        arb = GoalArbitrator(temperature=1.0)
+        arb.temperature = 0.5
+        self.assertEqual(arb.softmax(values), GoalArbitrator(temperature=0.5).softmax(values))
+        with self.assertRaises(ValueError):
+            arb.temperature = 0.0
+
     def test_select_goal_returns_valid_goal(self):
         arb = GoalArbitrator([self.g1, self.g2, self.g3])
         selected = arb.select_goal(self.t, self.state)
         self.assertIn(selected, [self.g1, self.g2, self.g3])
 
+    def test_select_goal_with_probs_matches_softmax(self):
+        for mode in ('softmax', 'max', 'lyapunov'):
+            arb = GoalArbitrator([self.g1, self.g2, self.g3], mode=mode)
+            selected, probs = arb.select_goal_with_probs(self.t, self.state)
+            values = [g.effective_value(self.t, self.state) for g in arb.goals]
+            self.assertEqual(probs, arb.softmax(values))
+            self.assertIs(selected, arb.goals[probs.index(max(probs))])
+        self.assertEqual(GoalArbitrator([]).select_goal_with_probs(self.t, self.state), (None, []))
+
+    def test_select_goal_stochastic_follows_softmax(self):
+        arb = GoalArbitrator([self.g1, self.g2, self.g3], temperature=0.1)
+        random.seed(0)
+        picks = [arb.select_goal_stochastic(0.5, self.state) for _ in range(200)]
+        values = [g.effective_value(0.5, self.state) for g in arb.goals]
+        probs = arb.softmax(values)
+        for goal, p in zip(arb.goals, probs):
+            self.assertAlmostEqual(picks.count(goal) / len(picks), p, delta=0.1)
+        self.assertIsNone(GoalArbitrator([]).select_goal_stochastic(self.t, self.state))
+
+    def test_select_top_k_orders_by_value(self):
+        arb = GoalArbitrator([self.g1, self.g2, self.g3])
+        values = [g.effective_value(0.5, self.state) for g in arb.goals]
+        ranked = [g for _, g in sorted(zip(values, arb.goals), key=lambda p: -p[0])]
+        self.assertEqual(arb.select_top_k(0.5, self.state, 2), ranked[:2])
+        self.assertEqual(arb.select_top_k(0.5, self.state, 1), ranked[:1])
+        self.assertEqual(arb.select_top_k(0.5, self.state, 5), ranked)
+        self.assertIs(arb.select_goal_stochastic(0.5, self.state, top_k=1), ranked[0])
+        random.seed(0)
+        for _ in range(20):
+            self.assertIn(arb.select_goal_stochastic(0.5, self.state, top_k=2), ranked[:2])
+
+    def test_top_k_must_be_positive(self):
+        arb = GoalArbitrator([self.g1, self.g2, self.g3])
+        for k in (0, -1):
+            with self.assertRaises(ValueError):
+                arb.select_top_k(0.5, self.state, k)
+            with self.assertRaises(ValueError):
+                arb.select_goal_stochastic(0.5, self.state, top_k=k)
+
+    def test_select_goal_small_sets(self):
+        self.assertIs(GoalArbitrator([self.g3]).select_goal(self.t, self.state), self.g3)
+        twin = Goal("Twin", linear_urgency, lambda s: 0.1)
+        for mode in ('max', 'softmax'):
+            arb = GoalArbitrator([self.g3, twin], mode=mode)
+            self.assertIs(arb.select_goal(self.t, self.state), self.g3)
+
+    def test_nash_arbitrate_prefers_higher_value(self):
+        low = Goal("Low", lambda t: 1.0, lambda s: -0.5)
+        high = Goal("High", lambda t: 1.0, lambda s: 0.2)
+        self.assertIs(GoalArbitrator([low, high]).nash_arbitrate(self.t, self.state), high)
+        self.assertIs(GoalArbitrator([high, low]).nash_arbitrate(self.t, self.state), high)
+
+    def test_nash_arbitrate_batch_matches_pairwise_iteration(self):
+        values = [x * 0.25 for x in range(-12, 13)]
+        arb = GoalArbitrator()
+        matrix = arb.nash_arbitrate_batch(values)
+        for i, ev_i in enumerate(values):
+            for j, ev_j in enumerate(values):
+                p_i, p_j = _nash_best_response(ev_i, ev_j, arb.nash_iterations)
+                self.assertEqual((matrix[i][j], matrix[j][i]), (p_i, p_j))
+        mixed = arb.nash_arbitrate_batch([-2.75, 3.0])
+        self.assertEqual(mixed[0][1], 1.0)
+        self.assertEqual(GoalArbitrator().nash_arbitrate_batch([]), [])
+
+    def test_nash_arbitrate_selection_matches_iteration(self):
+        for ev_1, ev_2 in [(-2.75, 3.0), (0.5, -0.2), (0.0, 0.0), (-1.0, -0.5), (0.3, 0.3)]:
+            g1 = Goal("G1", lambda t: 1.0, lambda s, v=ev_1: v)
+            g2 = Goal("G2", lambda t: 1.0, lambda s, v=ev_2: v)
+            p1, p2 = _nash_best_response(ev_1, ev_2, 20)
+            expected = g1 if p1 > p2 or (p1 == p2 and ev_1 >= ev_2) else g2
+            self.assertIs(GoalArbitrator([g1, g2]).nash_arbitrate(self.t, self.state), expected)
+
+    def test_nash_rank_indicators_with_mixed_signs(self):
+        # The indicators differ from the engagement probabilities...
+        self.assertEqual(_nash_rank_indicators(-2.75, 3.0), (0.0, 1.0))
+        self.assertEqual(_nash_best_response(-2.75, 3.0, 20), (1.0, 1.0))
+        # ...but pick the same goal once ties fall back to the values
+        low = Goal("Low", lambda t: 1.0, lambda s: -2.75)
+        high = Goal("High", lambda t: 1.0, lambda s: 3.0)
+        self.assertIs(GoalArbitrator([low, high]).nash_arbitrate(self.t, self.state), high)
+
+    def test_nash_arbitrate_requires_two_goals(self):
+        with self.assertRaises(ValueError):
+            GoalArbitrator([self.g1, self.g2, self.g3]).nash_arbitrate(self.t, self.state)
+
+    def test_lyapunov_rewards_rising_value(self):
+        level = {"a": 0.5, "b": 0.6}
+        rising = Goal("Rising", lambda t: 1.0, lambda s: level["a"])
+        steady = Goal("Steady", lambda t: 1.0, lambda s: level["b"])
+        arb = GoalArbitrator([rising, steady], mode='lyapunov', delta_t=1.0)
+        self.assertIs(arb.select_goal(0.0, self.state), steady)
+        level["a"] = 0.55
+        self.assertIs(arb.select_goal(1.0, self.state), rising)
+
+    def test_lyapunov_breaks_ties_by_position(self):
+        a = Goal("A", lambda t: 1.0, lambda s: 0.5)
+        b = Goal("B", lambda t: 1.0, lambda s: 0.5)
+        self.assertIs(GoalArbitrator([a, b], mode='lyapunov').select_goal(0.0, self.state), a)
+        self.assertIs(GoalArbitrator([b, a], mode='lyapunov').select_goal(0.0, self.state), b)
+
+    def test_goals_frozen_and_reassignment_resets_history(self):
+        goals = [self.g1, self.g2]
+        arb = GoalArbitrator(goals, mode='lyapunov')
+        goals.append(self.g3)
+        self.assertEqual(arb.goals, (self.g1, self.g2))
+        arb.select_goal(self.t, self.state)
+        arb.goals = [self.g1, self.g2, self.g3]
+        self.assertEqual(len(arb._previous_values), 3)
+        self.assertTrue(all(v != v for v in arb._previous_values))
+
+    def test_shared_dependency_evaluated_once_per_call(self):
+        calls = []
+        shared = Goal("Shared", lambda t: 1.0, lambda s: calls.append(1) or 0.4)
+        a = Goal("A", lambda t: 1.0, lambda s: 0.1, dependencies=[shared])
+        b = Goal("B", lambda t: 1.0, lambda s: 0.2, dependencies=[shared])
+        arb = GoalArbitrator([a, b, shared], mode='lyapunov')
+        self.assertIs(arb.select_goal(self.t, self.state), b)
+        self.assertEqual(len(calls), 1)
+
+    def test_trait_based_selection_weights_goal_traits(self):
+        plain = Goal("Plain", lambda t: 1.0, lambda s: 0.5)
+        bold = Goal("Bold", lambda t: 1.0, lambda s: 0.4, traits=[Trait("BOLD", 2.0)])
+        self.assertEqual(bold.get_trait_value("BOLD"), 2.0)
+        self.assertIsNone(plain.get_trait_value("BOLD"))
+        arb = GoalArbitrator([plain, bold])
+        self.assertIs(arb.trait_based_selection({}, self.t, self.state), plain)
+        self.assertIs(arb.trait_based_selection({"BOLD": 0.1}, self.t, self.state), bold)
+
+    def test_begin_tick_reuses_values_until_next_tick(self):
+        calls = []
+        dep = Goal("Dep", lambda t: 1.0, lambda s: calls.append("dep") or 0.3)
+        top = Goal("Top", lambda t: 1.0, lambda s: calls.append("top") or 0.5, dependencies=[dep])
+        top.effective_value(self.t, self.state)
+        top.effective_value(self.t, self.state)
+        self.assertEqual(len(calls), 4)
+
+        arb = GoalArbitrator([top])
+        arb.begin_tick()
+        calls.clear()
+        first = top.effective_value(self.t, self.state)
+        self.assertEqual(top.effective_value(self.t, self.state), first)
+        text = top.describe(self.t, self.state)
+        self.assertIs(top.describe(self.t, self.state), text)
+        self.assertEqual(sorted(calls), ["dep", "top"])
+        arb.begin_tick()
+        top.effective_value(self.t, self.state)
+        self.assertEqual(len(calls), 4)
+
+    def test_end_tick_disables_cache(self):
+        level = {"u": 0.2}
+        dep = Goal("Dep", lambda t: 1.0, lambda s: level["u"])
+        top = Goal("Top", lambda t: 1.0, lambda s: 0.5, dependencies=[dep])
+        arb = GoalArbitrator([top])
+        arb.begin_tick()
+        self.assertAlmostEqual(top.effective_value(self.t, self.state), 0.7)
+        level["u"] = 0.4
+        self.assertAlmostEqual(top.effective_value(self.t, self.state), 0.7)
+        arb.end_tick()
+        self.assertIsNone(dep._tick_cache)
+        self.assertAlmostEqual(top.effective_value(self.t, self.state), 0.9)
+
+    def test_tick_cache_not_confused_by_new_state_objects(self):
+        goal = Goal("Level", lambda t: 1.0, lambda s: s["level"])
+        goal.begin_tick()
+        self.assertEqual([goal.utility({"level": x}) for x in range(4)], [0, 1, 2, 3])
+        self.assertEqual([goal.effective_value(self.t, {"level": x}) for x in range(4)], [0, 1, 2, 3])
+
+    def test_add_goal_keeps_lyapunov_history(self):
+        level = {"a": 0.5}
+        rising = Goal("Rising", lambda t: 1.0, lambda s: level["a"])
+        steady = Goal("Steady", lambda t: 1.0, lambda s: 0.6)
+        arb = GoalArbitrator([rising], mode='lyapunov', delta_t=1.0)
+        arb.select_goal(0.0, self.state)
+        arb.add_goal(steady)
+        self.assertEqual(arb.goals, (rising, steady))
+        level["a"] = 0.55
+        self.assertIs(arb.select_goal(1.0, self.state), rising)
+
+    def test_get_goal_by_name(self):
+        arb = GoalArbitrator([self.g1, self.g2])
+        self.assertIs(arb.get_goal("Survive"), self.g2)
+        self.assertIsNone(arb.get_goal("Idle"))
+        arb.add_goal(self.g3)
+        self.assertIs(arb.get_goal("Idle"), self.g3)
+
+    def test_select_goal_incremental_rescores_only_changed_goals(self):
+        calls = []
+
+        def reader(key):
+            return lambda s: calls.append(key) or s[key]
+
+        cognitive = CognitiveState()
+        cognitive.update({"a": 0.2, "b": 0.5, "c": 0.1})
+        goals = [Goal(key.upper(), lambda t: 1.0, reader(key), depends_on={key}) for key in "abc"]
+        arb = GoalArbitrator(goals)
+        cognitive.add_change_listener(arb.on_state_change)
+        state = cognitive._state_data
+        self.assertIs(arb.select_goal_incremental(self.t, state), goals[1])
+        for key, value, expected in [("a", 0.9, 0), ("a", 0.3, 1), ("c", 0.5, 1), ("b", 0.0, 2)]:
+            calls.clear()
+            cognitive.set(key, value)
+            self.assertIs(arb.select_goal_incremental(self.t, state), goals[expected])
+            self.assertEqual(calls, [key])
+            self.assertIs(arb._select_max(self.t, state), goals[expected])
+
+        calls.clear()
+        arb.select_goal_incremental(self.t, state)
+        self.assertEqual(calls, [])
+        arb.select_goal_incremental(self.t + 1, state)
+        self.assertEqual(sorted(calls), ["a", "b", "c"])
+
+    def test_select_goal_incremental_keeps_key_index_across_ticks(self):
+        goals = [Goal(key.upper(), lambda t: 1.0, (lambda k: lambda s: s[k])(key), depends_on={key})
+                 for key in "ab"]
+        arb = GoalArbitrator(goals)
+        state = {"a": 0.2, "b": 0.5}
+        arb.select_goal_incremental(self.t, state)
+        index = arb._positions_by_key
+        self.assertEqual(index, {"a": [0], "b": [1]})
+        arb.select_goal_incremental(self.t + 1, state)
+        self.assertIs(arb._positions_by_key, index)
+        state["a"] = 0.9
+        arb.mark_dirty(["a"])
+        self.assertIs(arb.select_goal_incremental(self.t + 1, state), goals[0])
+        arb.invalidate()
+        self.assertIsNone(arb._positions_by_key)
+        self.assertIs(arb.select_goal_incremental(self.t + 2, state), arb._select_max(self.t + 2, state))
+
+    def test_constant_utility_goal_matches_plain_goal(self):
+        for traits in (None, [EXPLORATORY], [RISK_AVERSE]):
+            constant = ConstantUtilityGoal("Idle", 0.1, traits=traits)
+            plain = Goal("Idle", linear_urgency, lambda s: 0.1, traits=traits)
+            self.assertEqual(constant.utility(self.state), plain.utility(self.state))
+            self.assertEqual(constant.effective_value(0.5, self.state), plain.effective_value(0.5, self.state))
+        arb = GoalArbitrator([self.g1, ConstantUtilityGoal("Idle", 0.1)], mode='max')
+        self.assertIs(arb.select_goal(0.5, self.state), self.g1)
+
     def test_select_goal_with_empty_list(self):
         arb = GoalArbitrator([])
         selected = arb.select_goal(self.t, self.state)
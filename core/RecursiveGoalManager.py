@@ -1,5 +1,36 @@
-from typing import List, Dict, Union, Optional
+from array import array
+from typing import Any, Callable, List, Dict, Sequence, Tuple, Type, Union, Optional
 import math
+import weakref
+
+from core.shared_types import SoftmaxTemperature
+
+
+def _edits_hierarchy(method: Callable[..., Any]) -> Callable[..., Any]:
+    def wrapper(self: '_SubgoalList', *args: Any, **kwargs: Any) -> Any:
+        result = method(self, *args, **kwargs)
+        self._owner._hierarchy_changed()
+        return result
+    return wrapper
+
+
+class _SubgoalList(list):
+    # List of subgoals that makes the managers compiled over its owner
+    # recompile when edited in place
+    __slots__ = ('_owner',)
+    _owner: 'Goal'
+
+    append = _edits_hierarchy(list.append)
+    extend = _edits_hierarchy(list.extend)
+    insert = _edits_hierarchy(list.insert)
+    remove = _edits_hierarchy(list.remove)
+    pop = _edits_hierarchy(list.pop)
+    clear = _edits_hierarchy(list.clear)
+    sort = _edits_hierarchy(list.sort)
+    reverse = _edits_hierarchy(list.reverse)
+    __setitem__ = _edits_hierarchy(list.__setitem__)
+    __delitem__ = _edits_hierarchy(list.__delitem__)
+    __iadd__ = _edits_hierarchy(list.__iadd__)
 
 
 class Goal:
@@ -13,7 +44,25 @@ class Goal:
 
     def __init__(self, name: str):
         self.name: str = name
-        self.subgoals: List['Goal'] = []
+        # Managers whose compiled hierarchy contains this goal; edits to the
+        # subgoals drop their compiled arrays
+        self._managers: 'weakref.WeakSet[RecursiveGoalManager]' = weakref.WeakSet()
+        self.subgoals = []
+
+    @property
+    def subgoals(self) -> List['Goal']:
+        return self._subgoals
+
+    @subgoals.setter
+    def subgoals(self, subgoals: List['Goal']) -> None:
+        wrapped = _SubgoalList(subgoals)
+        wrapped._owner = self
+        self._subgoals = wrapped
+        self._hierarchy_changed()
+
+    def _hierarchy_changed(self) -> None:
+        for manager in self._managers:
+            manager._goals = None
 
     def evaluate(self, t: float, state: dict) -> float:
         """
@@ -28,6 +77,24 @@ class Goal:
         """
         raise NotImplementedError(f"Goal.evaluate not implemented for {self.name}")
 
+    @classmethod
+    def evaluate_batch(cls, goals: List['Goal'], t: float, state: dict) -> List[float]:
+        """
+        Evaluate several goals of this class at the same time and state.
+
+        The default evaluates each goal in turn; subclasses whose value depends only
+        on t and state can compute it once for the whole batch.
+
+        Args:
+            goals (List[Goal]): Goals of exactly this class.
+            t (float): Current time or timestep.
+            state (dict): State dictionary representing internal/external conditions.
+
+        Returns:
+            List[float]: Value of each goal, aligned with goals.
+        """
+        return [goal.evaluate(t, state) for goal in goals]
+
     def evaluate_lyapunov(self, t: float, state: dict) -> float:
         """
         Compute Lyapunov stability metric for this goal.
@@ -68,8 +135,17 @@ class Goal:
         """
         return {}  # Default no trait influence
 
+    def _modulated_value(self, base_value: float, t: float, state: dict) -> float:
+        """Scale a base value by the summed trait modifiers and the commitment at t."""
+        modifier = sum(self.trait_modifiers(state).values())
+        return base_value * (1 + modifier) * self.commitment_curve(t)
+
+
+# Weight of the single goal chosen by max mode (or the only candidate)
+_UNIT_WEIGHT = (1.0,)
 
-class GoalArbitrator:
+
+class GoalArbitrator(SoftmaxTemperature):
     """
     Arbitration mechanism to select among competing goals.
 
@@ -78,45 +154,82 @@ class GoalArbitrator:
     Attributes:
         mode (str): Arbitration mode. Options: 'max', 'softmax'.
         temperature (float): Temperature parameter for softmax smoothing.
+        stable (bool): Subtract the maximum before exponentiating. Only disable it
+            when expected values divided by the temperature stay well below ~700,
+            where math.exp would overflow.
     """
 
-    def __init__(self, mode: str = 'softmax', temperature: float = 1.0):
+    def __init__(self, mode: str = 'softmax', temperature: float = 1.0, stable: bool = True):
         if mode not in ('max', 'softmax'):
             raise ValueError(f"Unknown arbitration mode: {mode}")
         self.mode: str = mode
-        self.temperature: float = temperature
+        self.temperature = temperature
+        self.stable: bool = stable
 
-    def select(self, expected_values: Dict[Goal, float]) -> Union[Goal, Dict[Goal, float]]:
+    def select(self, values: List[float]) -> Tuple[Sequence[int], Sequence[float]]:
         """
         Select a goal or distribution over goals given their expected values.
 
         Args:
-            expected_values (Dict[Goal, float]): Mapping from goals to their expected values.
+            values (List[float]): Expected values of the candidate goals, by position.
 
         Returns:
-            Union[Goal, Dict[Goal, float]]: Selected goal (max mode) or distribution (softmax).
+            Tuple[Sequence[int], Sequence[float]]: Positions of the selected goals and
+            their weights. Max mode selects one position with weight 1.0, softmax
+            selects every position; both are empty if there are no candidates.
         """
-        if not expected_values:
-            return {}
+        n = len(values)
+        if n == 0:
+            return (), ()
 
         if self.mode == 'max':
             # Deterministically pick the goal with highest expected value
-            selected_goal = max(expected_values.items(), key=lambda x: x[1])[0]
-            return selected_goal
-
-        elif self.mode == 'softmax':
-            max_val = max(expected_values.values())
-            exp_vals = {
-                g: math.exp((v - max_val) / self.temperature)
-                for g, v in expected_values.items()
-            }
-            total = sum(exp_vals.values())
-            if total == 0:
-                # Avoid division by zero, fallback to uniform
-                n = len(exp_vals)
-                return {g: 1/n for g in exp_vals}
-            normalized = {g: val / total for g, val in exp_vals.items()}
-            return normalized
+            if n == 2:
+                return (0 if values[0] >= values[1] else 1,), _UNIT_WEIGHT
+            return (values.index(max(values)),), _UNIT_WEIGHT
+
+        if self.mode != 'softmax':
+            return (), ()
+        positions = range(n)
+        if n == 1:
+            return positions, _UNIT_WEIGHT
+        return positions, self._softmax(values)
+
+    def _softmax(self, values: List[float]) -> List[float]:
+        """Softmax weights over two or more expected values."""
+        n = len(values)
+        if n == 2:
+            # Two-goal softmax needs one exp: p1 = 1 / (1 + exp((v2 - v1) / T))
+            v1, v2 = values
+            if v1 >= v2:
+                e = math.exp((v2 - v1) * self._inv_temperature)
+                p = 1.0 / (1.0 + e)
+                return [p, e * p]
+            e = math.exp((v1 - v2) * self._inv_temperature)
+            p = 1.0 / (e + 1.0)
+            return [e * p, p]
+        inv_t = self._inv_temperature
+        if not self.stable:
+            # Bounded values: one exp pass, no max scan or shift
+            if inv_t == 1.0:
+                exps = list(map(math.exp, values))
+            else:
+                exps = [math.exp(v * inv_t) for v in values]
+        else:
+            max_val = max(values)
+            if inv_t == 1.0:
+                exps = [math.exp(v - max_val) for v in values]
+            else:
+                # Scale and max-shift fused into one affine map: v * inv_t + c
+                c = -max_val * inv_t
+                exps = [math.exp(v * inv_t + c) for v in values]
+        total = sum(exps)
+        if total == 0:
+            # Avoid division by zero, fallback to uniform
+            return [1/n] * n
+        # Normalize with one reciprocal instead of one division per goal
+        inv_total = 1.0 / total
+        return [e * inv_total for e in exps]
 
 
 class RecursiveGoalManager:
@@ -124,6 +237,10 @@ class RecursiveGoalManager:
     Manages a hierarchy of goals recursively, using an arbitrator to select and
     evaluate goals over time.
 
+    The hierarchy is compiled into flat index arrays on the first step and reused
+    afterwards. Assigning or editing any goal's subgoals, or the root goal, makes
+    the next step rebuild them.
+
     Attributes:
         root_goal (Goal): Top-level root goal.
         arbitrator (GoalArbitrator): Arbitration mechanism for goal selection.
@@ -131,13 +248,31 @@ class RecursiveGoalManager:
     """
 
     def __init__(self, root_goal: Goal, arbitrator: GoalArbitrator):
-        self.root_goal: Goal = root_goal
+        # Compiled hierarchy (see compile), rebuilt lazily after edits
+        self._goals: Optional[List[Goal]] = None
+        self.root_goal = root_goal
         self.arbitrator: GoalArbitrator = arbitrator
         self.t: float = 0.0
+        # Subgoals grouped by class for evaluate_batch, with their positions
+        self._batches: Dict[Type[Goal], Tuple[List[Goal], List[int]]] = {}
+        self._child_indptr: array = array('i')
+        self._child_indices: array = array('i')
+
+    @property
+    def root_goal(self) -> Goal:
+        return self._root_goal
+
+    @root_goal.setter
+    def root_goal(self, root_goal: Goal) -> None:
+        self._root_goal = root_goal
+        self._goals = None
 
     def step(self, dt: float, state: dict) -> float:
         """
-        Advance time by dt and evaluate the goal hierarchy recursively.
+        Advance time by dt and evaluate the goal hierarchy.
+
+        Max mode walks down the selected branch only; softmax sweeps every
+        subtree bottom-up.
 
         Args:
             dt (float): Time increment.
@@ -147,41 +282,142 @@ class RecursiveGoalManager:
             float: Aggregated expected value of the root goal after evaluation.
         """
         self.t += dt
-        return self._evaluate_recursive(self.root_goal, state, level=0)
+        if self._goals is None:
+            self.compile()
+
+        goals = self._goals
+        assert goals is not None  # set by compile
+        indptr = self._child_indptr
+        indices = self._child_indices
+        t = self.t
+
+        if len(goals) == 1:
+            # Root without subgoals: evaluate directly
+            return goals[0].evaluate(t, state)
+
+        if self.arbitrator.mode == 'max':
+            return self._step_max(t, state)
+
+        # Softmax weighs every subtree: own value of every subgoal, evaluated
+        # once per class batch; the root is last and never arbitrated
+        values = [0.0] * len(goals)
+        for cls, (batch, positions) in self._batches.items():
+            for i, value in zip(positions, cls.evaluate_batch(batch, t, state)):
+                values[i] = value
+        # Subtree values, swept children-first; leaves keep their own value
+        subtree = list(values)
+
+        for i in range(len(goals)):
+            start, end = indptr[i], indptr[i + 1]
+            if start == end:
+                continue
+
+            children = indices[start:end]
+            # Arbitration over the subgoals' expected values decides which to prioritize
+            selected, weights = self.arbitrator.select([values[c] for c in children])
+
+            # Weighted sum of the selected subgoals' subtree values (one of them
+            # with weight 1.0 in max mode)
+            total_value = 0.0
+            for p, weight in zip(selected, weights):
+                total_value += weight * subtree[children[p]]
+            subtree[i] = total_value
 
-    def _evaluate_recursive(self, goal: Goal, state: dict, level: int) -> float:
+        return subtree[-1]
+
+    def _step_max(self, t: float, state: dict) -> float:
         """
-        Recursively evaluate a goal and its subgoals according to the arbitrator.
+        Follow the selected branch down from the root, evaluating only the
+        subgoals of goals on that path.
+
+        Max mode gives every unselected subtree weight zero, so its goals are
+        never evaluated. The leaf reached keeps the value it was selected with.
 
         Args:
-            goal (Goal): Current goal node.
-            state (dict): Current state.
-            level (int): Recursion depth level.
+            t (float): Current time.
+            state (dict): Current system state.
 
         Returns:
-            float: Expected value of the evaluated goal subtree.
+            float: Value of the leaf at the end of the selected path.
         """
-        if not goal.subgoals:
-            # Leaf goal: evaluate directly
-            return goal.evaluate(self.t, state)
+        goals = self._goals
+        assert goals is not None  # set by compile
+        indptr = self._child_indptr
+        indices = self._child_indices
+        i = len(goals) - 1
+        value = 0.0
+        while indptr[i] != indptr[i + 1]:
+            children = indices[indptr[i]:indptr[i + 1]]
+            values = [goals[c].evaluate(t, state) for c in children]
+            selected, _ = self.arbitrator.select(values)
+            p = selected[0]
+            i = children[p]
+            value = values[p]
+        return value
+
+    def compile(self) -> None:
+        """
+        Number the goal hierarchy and store its child lists in CSR form.
 
-        # Evaluate each subgoal's expected value
-        expected_values = {sg: sg.evaluate(self.t, state) for sg in goal.subgoals}
-        # Arbitration decides which goal(s) to prioritize
-        selected = self.arbitrator.select(expected_values)
+        Goals are numbered in post-order, so every subgoal has a lower index than
+        its parents and the root is last. Children of goal i are
+        _child_indices[_child_indptr[i]:_child_indptr[i + 1]]. Subgoals are also
+        grouped by class so each step evaluates them through evaluate_batch.
+        Every goal records this manager, so editing its subgoals drops the arrays.
+        """
+        goals = self._flatten()
+        index_of = {id(goal): i for i, goal in enumerate(goals)}
+        indptr = array('i', [0])
+        indices = array('i')
+        for goal in goals:
+            indices.extend(index_of[id(sg)] for sg in goal.subgoals)
+            indptr.append(len(indices))
+
+        by_class: Dict[Type[Goal], Tuple[List[Goal], List[int]]] = {}
+        for i, goal in enumerate(goals[:-1]):
+            batch, positions = by_class.setdefault(type(goal), ([], []))
+            batch.append(goal)
+            positions.append(i)
+
+        for goal in goals:
+            goal._managers.add(self)
+        self._goals = goals
+        self._batches = by_class
+        self._child_indptr = indptr
+        self._child_indices = indices
+
+    def _flatten(self) -> List[Goal]:
+        """
+        Order the goal hierarchy so that every subgoal precedes its parent.
 
-        if isinstance(selected, dict):
-            # Softmax: weighted sum of subgoals
-            total_value = 0.0
-            for subgoal, weight in selected.items():
-                # Recursive evaluation weighted by arbitrator distribution
-                subval = self._evaluate_recursive(subgoal, state, level + 1)
-                total_value += weight * subval
-            return total_value
+        Returns:
+            List[Goal]: Goals in post-order, ending with the root goal.
 
-        else:
-            # Max mode: single selected goal
-            return self._evaluate_recursive(selected, state, level + 1)
+        Raises:
+            ValueError: If the hierarchy contains a cycle.
+        """
+        order: List[Goal] = []
+        done: set = set()
+        on_path: set = set()
+        # Explicit stack of (goal, index of the next subgoal to visit)
+        stack = [(self.root_goal, 0)]
+        on_path.add(id(self.root_goal))
+        while stack:
+            goal, i = stack[-1]
+            if i < len(goal.subgoals):
+                stack[-1] = (goal, i + 1)
+                child = goal.subgoals[i]
+                if id(child) in on_path:
+                    raise ValueError(f"Goal hierarchy contains a cycle through {child.name}")
+                if id(child) not in done:
+                    on_path.add(id(child))
+                    stack.append((child, 0))
+            else:
+                stack.pop()
+                on_path.discard(id(goal))
+                done.add(id(goal))
+                order.append(goal)
+        return order
 
     def reset(self) -> None:
         """Reset internal time to zero."""
@@ -201,14 +437,22 @@ class RecursiveGoalManager:
 
 # --- Example concrete goal implementations with trait modifiers, commitment, stability ---
 
+# EatFoodGoal commitment rises linearly from 0.1 and reaches 1.0 at t = 10
+_EAT_SATURATION_TIME = 10.0
+_EAT_COMMITMENT_RATE = 0.9 / _EAT_SATURATION_TIME
+
 class EatFoodGoal(Goal):
     def evaluate(self, t: float, state: dict) -> float:
         hunger = state.get("hunger", 0.5)  # 0 = full, 1 = starving
-        base_value = hunger  # More hunger means higher value
-        trait_influence = self.trait_modifiers(state)
-        modifier = sum(trait_influence.values())
-        commitment = self.commitment_curve(t)
-        return base_value * (1 + modifier) * commitment
+        return self._modulated_value(hunger, t, state)  # More hunger means higher value
+
+    @classmethod
+    def evaluate_batch(cls, goals: List[Goal], t: float, state: dict) -> List[float]:
+        if cls is not EatFoodGoal or not goals:
+            # Subclasses may override evaluate; keep the per-goal path for them
+            return super().evaluate_batch(goals, t, state)
+        # Value depends only on t and state, so all instances share one evaluation
+        return [goals[0].evaluate(t, state)] * len(goals)
 
     def trait_modifiers(self, state: dict) -> Dict[str, float]:
         # Example: if "food_aversion" trait exists and is high, reduce motivation
@@ -216,8 +460,10 @@ class EatFoodGoal(Goal):
         return {"food_aversion": -food_aversion}
 
     def commitment_curve(self, t: float) -> float:
-        # Hunger urgency grows over time without food
-        return min(1.0, 0.1 + 0.9 * (t / 10.0))  # saturates at 1 over 10 units time
+        # Hunger urgency grows over time without food; saturates at 1 over 10 units time
+        if t >= _EAT_SATURATION_TIME:
+            return 1.0
+        return 0.1 + _EAT_COMMITMENT_RATE * t
 
     def evaluate_lyapunov(self, t: float, state: dict) -> float:
         hunger = state.get("hunger", 0.5)
@@ -228,11 +474,13 @@ class EatFoodGoal(Goal):
 class SocialBondingGoal(Goal):
     def evaluate(self, t: float, state: dict) -> float:
         affection = state.get("affection", 0.5)
-        base_value = affection
-        trait_influence = self.trait_modifiers(state)
-        modifier = sum(trait_influence.values())
-        commitment = self.commitment_curve(t)
-        return base_value * (1 + modifier) * commitment
+        return self._modulated_value(affection, t, state)
+
+    @classmethod
+    def evaluate_batch(cls, goals: List[Goal], t: float, state: dict) -> List[float]:
+        if cls is not SocialBondingGoal or not goals:
+            return super().evaluate_batch(goals, t, state)
+        return [goals[0].evaluate(t, state)] * len(goals)
 
     def trait_modifiers(self, state: dict) -> Dict[str, float]:
         # Example: "social_anxiety" reduces bonding motivation
@@ -1,34 +1,51 @@
 from typing import Optional, Iterable
-from enum import Enum, auto
+from enum import Enum
 
 class Trait(Enum):
-    URGENCY_SENSITIVE = auto()
-    RISK_AVERSE = auto()
-    EXPLORATORY = auto()
-    DEPENDENCY_CRITICAL = auto()
+    # One bit per trait so a TraitSet packs into a single int
+    URGENCY_SENSITIVE = 1 << 0
+    RISK_AVERSE = 1 << 1
+    EXPLORATORY = 1 << 2
+    DEPENDENCY_CRITICAL = 1 << 3
 
 class TraitSet:
+    __slots__ = ('_bits',)
+
     def __init__(self, traits: Optional[Iterable[Trait]] = None):
-        # Immutable frozenset holds the traits
-        self.traits: frozenset[Trait] = frozenset(traits) if traits else frozenset()
+        # Immutable bitmask holds the traits: membership is one AND, edits one OR/AND-NOT
+        bits = 0
+        if traits:
+            for trait in traits:
+                bits |= trait.value
+        self._bits: int = bits
+
+    @classmethod
+    def _from_bits(cls, bits: int) -> 'TraitSet':
+        trait_set = cls.__new__(cls)
+        trait_set._bits = bits
+        return trait_set
+
+    @property
+    def traits(self) -> frozenset:
+        return frozenset(t for t in Trait if self._bits & t.value)
 
     def add_trait(self, trait: Trait) -> 'TraitSet':
         # Returns a new TraitSet with trait added (immutability preserved)
-        return TraitSet(set(self.traits) | {trait})
+        return TraitSet._from_bits(self._bits | trait.value)
 
     def remove_trait(self, trait: Trait) -> 'TraitSet':
         # Returns a new TraitSet with trait removed
-        return TraitSet(set(self.traits) - {trait})
+        return TraitSet._from_bits(self._bits & ~trait.value)
 
     def has_trait(self, trait: Trait) -> bool:
-        return trait in self.traits
+        return bool(self._bits & trait.value)
 
     def __repr__(self) -> str:
         trait_names = sorted(t.name for t in self.traits)
         return f"TraitSet({trait_names})"
 
     def __eq__(self, other) -> bool:
-        return isinstance(other, TraitSet) and self.traits == other.traits
+        return isinstance(other, TraitSet) and self._bits == other._bits
 
     def __hash__(self) -> int:
-        return hash(self.traits)
+        return self._bits
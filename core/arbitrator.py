@@ -1,9 +1,59 @@
+import heapq
 import math
-from typing import List, Optional, Dict, Union
+import random
+from typing import Any, Iterable, List, Optional, Dict, Sequence, Set, Tuple, Union
 from core.goalModule import Goal
+from core.shared_types import SoftmaxTemperature
 
 
-class GoalArbitrator:
+def _nash_rank_indicators(ev_g1: float, ev_g2: float) -> Tuple[float, float]:
+    """
+    Ranking indicators equivalent to best-response dynamics in the two-goal
+    engagement game.
+
+    Payoffs: engaging alone earns a goal its own value, engaging together
+    earns both values, and not engaging earns nothing, so
+        u_engage_g1 = ev_g1 + p2 * ev_g2,   u_not_engage_g1 = 0
+    and symmetrically for g2. The indicators are not the engagement
+    probabilities the dynamics settle on: with mixed signs a goal with a
+    negative value may still engage, e.g. (-2.75, 3.0) iterates to (1, 1)
+    (see _nash_best_response). But comparing p1 with p2, then falling back to
+    the values on ties, picks the same goal for these indicators as for the
+    iterated probabilities, which is all nash_arbitrate needs.
+
+    Returns:
+        1.0 or 0.0 per goal, by whether its own value is positive.
+    """
+    p1 = 1.0 if ev_g1 > 0.0 else 0.0
+    p2 = 1.0 if ev_g2 > 0.0 else 0.0
+    return p1, p2
+
+
+def _nash_best_response(ev_g1: float, ev_g2: float, n_iter: int) -> Tuple[float, float]:
+    """
+    Iterate simultaneous best responses of the engagement game from (0.5, 0.5).
+
+    This is the full dynamics behind _nash_rank_indicators, for callers that
+    need the engagement probabilities themselves rather than the ranking:
+    with mixed-sign values a goal with a negative value may still engage,
+    e.g. (-2.75, 3.0) settles on (1.0, 1.0).
+
+    Returns:
+        Final engagement probabilities (p1, p2).
+    """
+    p1, p2 = 0.5, 0.5
+    for _ in range(n_iter):
+        util_engage_g1 = ev_g1 + p2 * ev_g2
+        p1_new = 1.0 if util_engage_g1 > 0.0 else 0.0 if util_engage_g1 < 0.0 else p1
+        util_engage_g2 = ev_g2 + p1 * ev_g1
+        p2_new = 1.0 if util_engage_g2 > 0.0 else 0.0 if util_engage_g2 < 0.0 else p2
+        if p1_new == p1 and p2_new == p2:
+            break
+        p1, p2 = p1_new, p2_new
+    return p1, p2
+
+
+class GoalArbitrator(SoftmaxTemperature):
     """
     Arbitrates among a set of goals using configurable strategies:
     - max: selects goal with maximum effective value
@@ -16,31 +66,155 @@ class GoalArbitrator:
 
     def __init__(
         self,
-        goals: Optional[List[Goal]] = None,
+        goals: Optional[Sequence[Goal]] = None,
         mode: str = 'softmax',
         temperature: float = 1.0,
         nash_iterations: int = 20,
         delta_t: float = 0.1
-    ):
-        self.goals: List[Goal] = goals if goals is not None else []
-        self.mode = mode
+    ) -> None:
+        self.goals = goals if goals is not None else ()
+        self.mode: str = mode
         self.temperature = temperature
-        self.nash_iterations = nash_iterations
-        self._previous_values: Dict[str, float] = {}  # For Lyapunov tracking, keyed by goal.name
-        self._delta_t = delta_t
+        self.nash_iterations: int = nash_iterations
+        self._delta_t: float = delta_t
+        # Lyapunov derivatives multiply by 1/delta_t; 0 disables them
+        self._inv_delta_t: float = 1.0 / delta_t if delta_t > 0 else 0.0
+
+    @property
+    def goals(self) -> Tuple[Goal, ...]:
+        return self._goals
+
+    @goals.setter
+    def goals(self, goals: Sequence[Goal]) -> None:
+        # Frozen into a tuple with its length cached; assigning a new goal set
+        # is the only way to edit it, so per-goal state is reset here.
+        self._goals: Tuple[Goal, ...] = tuple(goals)
+        self._n: int = len(self._goals)
+        # For Lyapunov tracking: previous value per goal position (NaN until first seen)
+        self._previous_values: List[float] = [math.nan] * self._n
+        # Per-goal scratch buffers reused by every selection call
+        self._values: List[float] = [0.0] * self._n
+        self._probs: List[float] = [0.0] * self._n
+        # Name index for get_goal; the first goal wins if names repeat
+        self._goals_by_name: Dict[str, Goal] = {}
+        for goal in reversed(self._goals):
+            self._goals_by_name[goal.name] = goal
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        Drop the state kept by select_goal_incremental, so its next call rescans
+        every goal. Needed after editing the goals' dependencies, depends_on or
+        traits in place.
+        """
+        # Lazy max-heap of (-value, position, generation); an entry is live only
+        # while its generation matches the position's current one
+        self._heap: Optional[List[Tuple[float, int, int]]] = None
+        self._generations: List[int] = [0] * self._n
+        self._scores: List[float] = [0.0] * self._n
+        self._heap_t: Optional[float] = None
+        self._heap_state: Optional[Dict[str, Any]] = None
+        # Positions to rescore, and which positions each state key affects;
+        # the key index only depends on the goals, so it outlives a new t
+        self._dirty: Set[int] = set()
+        self._positions_by_key: Optional[Dict[str, List[int]]] = None
+        self._undeclared_positions: List[int] = []
+
+    def add_goal(self, goal: Goal) -> None:
+        """
+        Append a goal, keeping the value history of the goals already held.
+
+        Goals are tracked by position, so the existing Lyapunov derivatives carry
+        on and only the new goal starts without a previous value.
+        """
+        previous_values = self._previous_values
+        self.goals = self._goals + (goal,)
+        previous_values.append(math.nan)
+        self._previous_values = previous_values
+
+    def get_goal(self, name: str) -> Optional[Goal]:
+        """Return the goal with the given name, or None if it is not arbitrated here."""
+        return self._goals_by_name.get(name)
+
+    def begin_tick(self) -> None:
+        """
+        Start a new tick: enable and reset the per-tick value cache of every goal
+        and of everything they depend on.
+
+        Until end_tick, goals reuse urgency, utility and effective values
+        computed for the same t and state object, so callers must not mutate
+        the state in between. Anything else holding the same goals sees the
+        cached values too, so end the tick as soon as it is over.
+        """
+        for goal in self._all_goals():
+            goal.begin_tick()
+
+    def end_tick(self) -> None:
+        """Disable the per-tick value cache enabled by begin_tick again."""
+        for goal in self._all_goals():
+            goal.end_tick()
+
+    def _all_goals(self) -> List[Goal]:
+        """Every goal held here and everything they depend on, once each."""
+        seen: Set[int] = set()
+        found: List[Goal] = []
+        stack: List[Goal] = list(self._goals)
+        while stack:
+            goal = stack.pop()
+            if id(goal) in seen:
+                continue
+            seen.add(id(goal))
+            found.append(goal)
+            stack.extend(goal.dependencies)
+        return found
+
+    def softmax(self, values: List[float], out: Optional[List[float]] = None) -> List[float]:
+        """
+        Softmax over values at the current temperature.
 
-    def softmax(self, values: List[float]) -> List[float]:
+        If out is given (a list of the same length) the probabilities are
+        written into it and it is returned, instead of allocating a new list.
+        """
         if not values:
             return []
         max_val = max(values)
-        exps = [math.exp((v - max_val) / self.temperature) for v in values]
+        inv_t = self._inv_temperature
+        exps: List[float]
+        if inv_t == 1.0:
+            # Default temperature: skip the scaling entirely
+            exps = [math.exp(v - max_val) for v in values]
+        else:
+            # Scale and max-shift fused into one affine map: v * inv_t + c
+            c = -max_val * inv_t
+            exps = [math.exp(v * inv_t + c) for v in values]
         sum_exps = sum(exps)
         if sum_exps == 0:
             # Avoid division by zero — uniform distribution
-            return [1.0 / len(values)] * len(values)
-        return [e / sum_exps for e in exps]
+            exps = [1.0] * len(values)
+            sum_exps = float(len(values))
+        # Normalize with one reciprocal instead of N divisions
+        inv_sum = 1.0 / sum_exps
+        if out is None:
+            return [e * inv_sum for e in exps]
+        for i, e in enumerate(exps):
+            out[i] = e * inv_sum
+        return out
+
+    def _evaluate_all(self, t: float, state: Dict[str, Any]) -> List[float]:
+        """
+        Write every goal's effective value into the shared values buffer.
+
+        All goals share one memo, so a dependency reachable from several goals
+        (or several paths) is evaluated once per call. The buffer is overwritten
+        by the next call, so callers must not keep it.
+        """
+        values = self._values
+        memo: Dict[int, float] = {}
+        for i, goal in enumerate(self._goals):
+            values[i] = goal.effective_value(t, state, memo)
+        return values
 
-    def select_goal(self, t: float, state: dict) -> Optional[Goal]:
+    def select_goal(self, t: float, state: Dict[str, Any]) -> Optional[Goal]:
         """
         Select a single goal to pursue based on current mode and state.
 
@@ -51,26 +225,20 @@ class GoalArbitrator:
         Returns:
             Selected Goal or None if no goals available.
         """
-        if not self.goals:
+        if self._n == 0:
             return None
 
         if self.mode == 'max':
-            values = [g.effective_value(t, state) for g in self.goals]
-            max_index = values.index(max(values))
-            return self.goals[max_index]
+            return self._select_max(t, state)
 
         elif self.mode == 'softmax':
-            values = [g.effective_value(t, state) for g in self.goals]
-            probs = self.softmax(values)
-            if not probs:
-                return None
-            # Choose goal with max probability (deterministic choice)
-            max_index = probs.index(max(probs))
-            return self.goals[max_index]
+            # Softmax is monotonic, so the most probable goal is the one with the
+            # highest value; no probabilities need computing
+            return self._select_max(t, state)
 
         elif self.mode == 'nash':
             # Nash equilibrium only for exactly two goals
-            if len(self.goals) != 2:
+            if self._n != 2:
                 raise ValueError("Nash arbitration requires exactly two goals.")
             return self.nash_arbitrate(t, state)
 
@@ -79,9 +247,173 @@ class GoalArbitrator:
 
         else:
             # Default fallback to max
-            values = [g.effective_value(t, state) for g in self.goals]
-            max_index = values.index(max(values))
-            return self.goals[max_index]
+            return self._select_max(t, state)
+
+    def select_goal_with_probs(self, t: float, state: Dict[str, Any]) -> Tuple[Optional[Goal], List[float]]:
+        """
+        Return the most probable goal under softmax together with the softmax
+        distribution over every goal's effective value, whatever the mode.
+
+        Returns:
+            (goal, probabilities), or (None, []) if no goals available.
+        """
+        if self._n == 0:
+            return None, []
+        values = self._evaluate_all(t, state)
+        max_index = values.index(max(values))
+        return self.goals[max_index], self.softmax(values)
+
+    def select_goal_stochastic(
+        self, t: float, state: Dict[str, Any], top_k: Optional[int] = None
+    ) -> Optional[Goal]:
+        """
+        Sample a goal from the softmax distribution over effective values.
+
+        Args:
+            t: current time or timestep
+            state: environment/internal state dict used by goals to compute value
+            top_k: if given, sample only among the top_k highest-value goals
+
+        Returns:
+            Sampled Goal or None if no goals available.
+
+        Raises:
+            ValueError: If top_k is less than 1.
+        """
+        if top_k is not None and top_k < 1:
+            raise ValueError(f"top_k must be at least 1, got {top_k}")
+        if self._n == 0:
+            return None
+        values = self._evaluate_all(t, state)
+        if top_k is not None and top_k < self._n:
+            top = self._top_k_indices(values, top_k)
+            if len(top) == 1:
+                return self.goals[top[0]]
+            probs = self.softmax([values[i] for i in top])
+            return self.goals[random.choices(top, weights=probs)[0]]
+        probs = self.softmax(values, out=self._probs)
+        return random.choices(self.goals, weights=probs)[0]
+
+    def select_top_k(self, t: float, state: Dict[str, Any], k: int) -> List[Goal]:
+        """
+        Return the k goals with the highest effective values, best first.
+
+        Uses a bounded heap, O(N log k), rather than sorting every goal;
+        no softmax is computed. Raises ValueError if k is less than 1.
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        if self._n == 0:
+            return []
+        values = self._evaluate_all(t, state)
+        goals = self.goals
+        return [goals[i] for i in self._top_k_indices(values, k)]
+
+    def _top_k_indices(self, values: List[float], k: int) -> List[int]:
+        """Positions of the k largest values, best first, earlier positions winning ties."""
+        if k == 1:
+            return [values.index(max(values))]
+        return heapq.nlargest(k, range(len(values)), key=values.__getitem__)
+
+    def select_goal_incremental(self, t: float, state: Dict[str, Any]) -> Optional[Goal]:
+        """
+        Return the goal with the highest effective value, like mode 'max', only
+        rescoring the goals invalidated since the previous call.
+
+        Values are kept in a heap. A new t or state object rescans every goal;
+        otherwise only the positions marked by mark_dirty (or on_state_change,
+        for use with CognitiveState.add_change_listener) are rescored, at
+        O(log N) each. Goals without declared depends_on keys are rescored on
+        any change. An active begin_tick cache would return the values from
+        before the change, so do not combine the two within one tick.
+        """
+        if self._n == 0:
+            return None
+        heap = self._heap
+        if heap is None or t != self._heap_t or state is not self._heap_state:
+            heap = self._rebuild_heap(t, state)
+        elif self._dirty:
+            self._rescore_dirty(heap, t, state)
+        generations = self._generations
+        # Discard stale entries until the top is a live one
+        while heap[0][2] != generations[heap[0][1]]:
+            heapq.heappop(heap)
+        return self.goals[heap[0][1]]
+
+    def mark_dirty(self, keys: Iterable[str]) -> None:
+        """Invalidate the incremental values of the goals reading any of the state keys."""
+        positions_by_key = self._positions_by_key
+        if self._heap is None or positions_by_key is None:
+            return
+        dirty = self._dirty
+        dirty.update(self._undeclared_positions)
+        for key in keys:
+            positions = positions_by_key.get(key)
+            if positions:
+                dirty.update(positions)
+
+    def on_state_change(self, changed: Dict[str, Any], full_state: Dict[str, Any]) -> None:
+        """Change-listener adapter for mark_dirty."""
+        self.mark_dirty(changed)
+
+    def _rebuild_heap(self, t: float, state: Dict[str, Any]) -> List[Tuple[float, int, int]]:
+        values = self._evaluate_all(t, state)
+        self._scores = list(values)
+        self._generations = [0] * self._n
+        heap = [(-v, i, 0) for i, v in enumerate(values)]
+        heapq.heapify(heap)
+        if self._positions_by_key is None:
+            self._index_state_keys()
+        self._heap = heap
+        self._heap_t = t
+        self._heap_state = state
+        self._dirty = set()
+        return heap
+
+    def _index_state_keys(self) -> None:
+        positions_by_key: Dict[str, List[int]] = {}
+        undeclared: List[int] = []
+        for i, goal in enumerate(self.goals):
+            keys = goal.state_keys()
+            if keys is None:
+                undeclared.append(i)
+                continue
+            for key in keys:
+                positions_by_key.setdefault(key, []).append(i)
+        self._positions_by_key = positions_by_key
+        self._undeclared_positions = undeclared
+
+    def _rescore_dirty(self, heap: List[Tuple[float, int, int]], t: float, state: Dict[str, Any]) -> None:
+        goals = self.goals
+        scores = self._scores
+        generations = self._generations
+        memo: Dict[int, float] = {}
+        for i in self._dirty:
+            value = goals[i].effective_value(t, state, memo)
+            scores[i] = value
+            generations[i] += 1
+            heapq.heappush(heap, (-value, i, generations[i]))
+        self._dirty.clear()
+        if len(heap) > 2 * self._n + 8:
+            # Compact once stale entries outnumber the live ones
+            heap[:] = [(-scores[i], i, generations[i]) for i in range(self._n)]
+            heapq.heapify(heap)
+
+    def _select_max(self, t: float, state: Dict[str, Any]) -> Goal:
+        """
+        Return the goal with the highest effective value, the first one on ties.
+
+        One- and two-goal sets, the common case, skip building a value list.
+        """
+        goals = self.goals
+        n = self._n
+        if n == 1:
+            return goals[0]
+        if n == 2:
+            g1, g2 = goals
+            return g1 if g1.effective_value(t, state) >= g2.effective_value(t, state) else g2
+        values = self._evaluate_all(t, state)
+        return goals[values.index(max(values))]
 
     def select(self, expected_values: Dict[Goal, float]) -> Union[Goal, Dict[Goal, float], None]:
         """
@@ -95,29 +427,28 @@ class GoalArbitrator:
             - Otherwise returns dict of normalized probabilities per goal
             - None if empty input
         """
-        if not expected_values:
+        n = len(expected_values)
+        if n == 0:
             return None
 
-        goals_list = list(expected_values.keys())
-        values = list(expected_values.values())
+        if n == 2:
+            # Nash arbitration between the two candidates, without replacing
+            # self.goals and the per-goal state that goes with them
+            g1, g2 = expected_values
+            return self._nash_select(g1, g2, t=0.0, state={})
 
-        if len(expected_values) == 2:
-            # Temporarily set goals and use Nash arbitrator
-            self.goals = goals_list
-            return self.nash_arbitrate(t=0.0, state={})
+        # Softmax probabilities over expected values; softmax already normalizes
+        # (uniform when every exponent underflows), so no second pass is needed
+        probs = self.softmax(list(expected_values.values()))
+        return dict(zip(expected_values, probs))
 
-        # Softmax probabilities over expected values
-        probs = self.softmax(values)
-        total_prob = sum(probs)
-        if total_prob == 0:
-            probs = [1.0 / len(probs)] * len(probs)
-            total_prob = 1.0
-        normalized_probs = {g: p / total_prob for g, p in zip(goals_list, probs)}
-        return normalized_probs
-
-    def nash_arbitrate(self, t: float, state: dict) -> Optional[Goal]:
+    def nash_arbitrate(self, t: float, state: Dict[str, Any]) -> Optional[Goal]:
         """
-        Nash equilibrium arbitration for exactly two goals using iterative best response.
+        Nash equilibrium arbitration for exactly two goals.
+
+        The best-response dynamics rank the two goals like closed-form
+        indicators (see _nash_rank_indicators), so nash_iterations is no
+        longer consulted.
 
         Args:
             t: Current time.
@@ -126,57 +457,18 @@ class GoalArbitrator:
         Returns:
             Selected Goal instance or None.
         """
-        if len(self.goals) != 2:
+        if self._n != 2:
             raise ValueError("Nash arbitration supports exactly two goals.")
 
         g1, g2 = self.goals
+        return self._nash_select(g1, g2, t, state)
 
+    def _nash_select(self, g1: Goal, g2: Goal, t: float, state: Dict[str, Any]) -> Goal:
+        """Nash arbitration between two given goals (see nash_arbitrate)."""
         ev_g1 = g1.effective_value(t, state)
         ev_g2 = g2.effective_value(t, state)
 
-        # Payoff matrices representing engagement utilities:
-        # Rows correspond to g1's action (0=not engage,1=engage)
-        # Columns correspond to g2's action (0=not engage,1=engage)
-
-        payoff_g1 = [
-            [0, 0],                 # g1 not engage
-            [ev_g1, ev_g1 + ev_g2] # g1 engage
-        ]
-
-        payoff_g2 = [
-            [0, ev_g2],             # g2 not engage
-            [0, ev_g2 + ev_g1]      # g2 engage
-        ]
-
-        # Initialize mixed strategy probabilities (engagement probabilities)
-        p1, p2 = 0.5, 0.5
-
-        for _ in range(self.nash_iterations):
-            # Best response for g1 given p2
-            util_engage_g1 = p2 * payoff_g1[1][1] + (1 - p2) * payoff_g1[1][0]
-            util_not_engage_g1 = p2 * payoff_g1[0][1] + (1 - p2) * payoff_g1[0][0]
-            if util_engage_g1 > util_not_engage_g1:
-                p1_new = 1.0
-            elif util_engage_g1 < util_not_engage_g1:
-                p1_new = 0.0
-            else:
-                p1_new = p1
-
-            # Best response for g2 given p1
-            util_engage_g2 = p1 * payoff_g2[1][1] + (1 - p1) * payoff_g2[0][1]
-            util_not_engage_g2 = p1 * payoff_g2[1][0] + (1 - p1) * payoff_g2[0][0]
-            if util_engage_g2 > util_not_engage_g2:
-                p2_new = 1.0
-            elif util_engage_g2 < util_not_engage_g2:
-                p2_new = 0.0
-            else:
-                p2_new = p2
-
-            # Check for convergence
-            if abs(p1 - p1_new) < 1e-4 and abs(p2 - p2_new) < 1e-4:
-                break
-
-            p1, p2 = p1_new, p2_new
+        p1, p2 = _nash_rank_indicators(ev_g1, ev_g2)
 
         # Choose goal with higher engagement probability; tie-break by effective value
         if p1 > p2:
@@ -186,7 +478,41 @@ class GoalArbitrator:
         else:
             return g1 if ev_g1 >= ev_g2 else g2
 
-    def lyapunov_arbitrate(self, t: float, state: dict) -> Optional[Goal]:
+    def nash_arbitrate_batch(self, values: Sequence[float]) -> List[List[float]]:
+        """
+        Engagement probabilities for every pairwise Nash game among N goals.
+
+        Entry [i][j] is goal i's engagement probability after best-response
+        iteration (see _nash_best_response) in the two-goal game against
+        goal j. The game is symmetric, so one matrix holds both players: each
+        round updates every pair at once from the previous round, entry [j][i]
+        serving as the opponent's probability for [i][j], and stops early once
+        no entry changes. At most nash_iterations rounds of O(N^2) each.
+
+        Args:
+            values: Effective values of the goals, by position.
+
+        Returns:
+            N x N matrix of engagement probabilities.
+        """
+        n = len(values)
+        probs = [[0.5] * n for _ in range(n)]
+        for _ in range(self.nash_iterations):
+            # Column j of the previous round, i.e. each opponent's probability
+            opponent = [list(column) for column in zip(*probs)]
+            updated = []
+            for ev_i, row, opp_row in zip(values, probs, opponent):
+                new_row = []
+                for ev_j, p_i, p_j in zip(values, row, opp_row):
+                    util_engage = ev_i + p_j * ev_j
+                    new_row.append(1.0 if util_engage > 0.0 else 0.0 if util_engage < 0.0 else p_i)
+                updated.append(new_row)
+            if updated == probs:
+                break
+            probs = updated
+        return probs
+
+    def lyapunov_arbitrate(self, t: float, state: Dict[str, Any]) -> Optional[Goal]:
         """
         Lyapunov stability-based arbitration: prefers goals with stable or improving
         effective values, using previous values to estimate temporal derivative.
@@ -198,35 +524,42 @@ class GoalArbitrator:
         Returns:
             Selected Goal instance or None.
         """
-        if not self.goals:
+        if self._n == 0:
             return None
 
-        candidates = []
-
-        for goal in self.goals:
-            current_val = goal.effective_value(t, state)
-            prev_val = self._previous_values.get(goal.name, current_val)
-
-            # Estimate time derivative of value
-            v_dot = (current_val - prev_val) / self._delta_t if self._delta_t > 0 else 0.0
-
-            # Lyapunov score favors goals with positive or stable values
-            # (If you want to favor stability, you could penalize large positive derivatives
-            # to avoid overshoot; here we reward positive slopes.)
-            penalty_weight = 1.0
-            lyapunov_score = current_val + penalty_weight * max(0.0, v_dot)
-
-            candidates.append((lyapunov_score, goal))
+        prev_values = self._previous_values
+        values = self._evaluate_all(t, state)
+        best_score: float = -math.inf
+        best_goal: Optional[Goal] = None
+
+        inv_delta_t = self._inv_delta_t
+        # Lyapunov score favors goals with positive or stable values
+        # (If you want to favor stability, you could penalize large positive derivatives
+        # to avoid overshoot; here we reward positive slopes.)
+        penalty_weight = 1.0
+
+        for i, goal in enumerate(self.goals):
+            current_val = values[i]
+
+            # Estimate time derivative of value. On the first observation the
+            # previous value is NaN, so v_dot is NaN and earns no bonus.
+            v_dot = (current_val - prev_values[i]) * inv_delta_t
+            lyapunov_score = current_val
+            if v_dot > 0.0:
+                lyapunov_score += penalty_weight * v_dot
+
+            # Keep the best Lyapunov score seen so far (the first one on ties)
+            if best_goal is None or lyapunov_score > best_score:
+                best_score = lyapunov_score
+                best_goal = goal
 
             # Update stored previous value for next iteration
-            self._previous_values[goal.name] = current_val
+            prev_values[i] = current_val
 
-        # Sort ascending by score to select goal with best Lyapunov stability
-        candidates.sort(key=lambda x: x[0], reverse=True)
-        return candidates[0][1] if candidates else None
+        return best_goal
 
     # Trait-based arbitration (example extension)
-    def trait_based_selection(self, traits: Dict[str, float], t: float, state: dict) -> Optional[Goal]:
+    def trait_based_selection(self, traits: Dict[str, float], t: float, state: Dict[str, Any]) -> Optional[Goal]:
         """
         Selects goal based on trait affinity or compatibility.
 
@@ -238,20 +571,21 @@ class GoalArbitrator:
         Returns:
             Selected Goal or None.
         """
-        if not self.goals:
+        if self._n == 0:
             return None
 
         # Example: weighted sum of goal traits vs provided traits
-        best_score = -math.inf
-        best_goal = None
-        for goal in self.goals:
+        values = self._evaluate_all(t, state)
+        best_score: float = -math.inf
+        best_goal: Optional[Goal] = None
+        for goal, value in zip(self.goals, values):
             score = 0.0
             for trait_name, trait_value in traits.items():
                 goal_trait_value = goal.get_trait_value(trait_name)
                 if goal_trait_value is not None:
                     score += trait_value * goal_trait_value
             # Optionally add effective value as part of score
-            score += goal.effective_value(t, state)
+            score += value
             if score > best_score:
                 best_score = score
                 best_goal = goal
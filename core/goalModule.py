@@ -1,21 +1,95 @@
 import math
-from typing import Callable, Dict, List, Optional
+import sys
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 from core.shared_types import Trait, TraitSet, URGENCY_SENSITIVE, RISK_AVERSE, EXPLORATORY
 
+# Bits of Goal._trait_mask for the traits that modulate values
+URGENCY_SENSITIVE_BIT = 1
+RISK_AVERSE_BIT = 2
+EXPLORATORY_BIT = 4
+
+_TRAIT_BITS = {
+    URGENCY_SENSITIVE.name: URGENCY_SENSITIVE_BIT,
+    RISK_AVERSE.name: RISK_AVERSE_BIT,
+    EXPLORATORY.name: EXPLORATORY_BIT,
+}
+
+# State keys read by the trait modulation behind each bit
+_TRAIT_BIT_STATE_KEYS = (
+    (RISK_AVERSE_BIT, frozenset({"risk", "safety_level"})),
+    (EXPLORATORY_BIT, frozenset({"novelty"})),
+)
+
+def _edits_topology(method: Callable[..., Any]) -> Callable[..., Any]:
+    def wrapper(self: '_DependencyList', *args: Any, **kwargs: Any) -> Any:
+        self._owner._topology_version += 1
+        return method(self, *args, **kwargs)
+    return wrapper
+
+class _DependencyList(list):
+    # List of dependencies that bumps its owner's topology version when edited
+    # in place, so compiled plans through that goal are rebuilt
+    __slots__ = ('_owner',)
+    _owner: 'Goal'
+
+    append = _edits_topology(list.append)
+    extend = _edits_topology(list.extend)
+    insert = _edits_topology(list.insert)
+    remove = _edits_topology(list.remove)
+    pop = _edits_topology(list.pop)
+    clear = _edits_topology(list.clear)
+    sort = _edits_topology(list.sort)
+    reverse = _edits_topology(list.reverse)
+    __setitem__ = _edits_topology(list.__setitem__)
+    __delitem__ = _edits_topology(list.__delitem__)
+    __iadd__ = _edits_topology(list.__iadd__)
+
+# One compiled plan step: a goal and the dependencies it averages over
+PlanStep = Tuple['Goal', Tuple['Goal', ...]]
+
+
+def _tick_store(tick_cache: Dict[tuple, Any], key: tuple, state: Any, value: Any) -> Any:
+    # Tick cache entries are keyed by id(state); holding the state as well keeps
+    # that id from being reused by a new dict while the entries are still live
+    tick_cache[(id(state),)] = state
+    tick_cache[key] = value
+    return value
+
 class Goal:
+    # Goals are created per node of every tree, so they skip the instance dict;
+    # subclasses that define no __slots__ of their own get one back
+    __slots__ = (
+        'name', '_urgency_fn', '_urgency_t', '_urgency_v', 'utility_fn',
+        '_dependencies', '_topology_version', '_plan', '_plan_versions',
+        '_traits', '_trait_mask', '_trait_version',
+        '_tick_cache', 'depends_on', 'pure_urgency', '__weakref__',
+    )
+
     def __init__(
         self,
         name: str,
         urgency_fn: Callable[[float], float],
         utility_fn: Callable[[Dict], float],
         dependencies: Optional[List['Goal']] = None,
-        traits: Optional[TraitSet] = None
+        traits: Optional[Union[TraitSet, List[Trait]]] = None,
+        depends_on: Optional[Iterable[str]] = None,
+        pure_urgency: bool = False
     ):
-        self.name = name
+        # Interned, since names key the arbitrator's name index and per-goal state lookups
+        self.name = sys.intern(name)
         self.urgency_fn = urgency_fn
+        # Whether urgency_fn depends on t alone, so a repeated t may reuse the
+        # previous result; off for urgency functions closing over mutable data
+        self.pure_urgency = pure_urgency
         self.utility_fn = utility_fn
+        # Bumped whenever this goal's own dependency list changes
+        self._topology_version = 0
         self.dependencies = dependencies or []
+        # Compiled evaluation plan (see compile) and the topology version of each
+        # of its goals; rebuilt once any of them changes
+        self._plan: Optional[List[PlanStep]] = None
+        self._plan_versions: Tuple[int, ...] = ()
 
         if traits is None:
             self.traits = TraitSet([])
@@ -24,66 +98,282 @@ class Goal:
         else:
             self.traits = TraitSet(traits)
 
+        # Per-tick cache of urgency/utility/effective_value, on from begin_tick to end_tick
+        self._tick_cache: Optional[Dict[tuple, Any]] = None
+
+        # State keys read by utility_fn, if declared; None means unknown, any
+        # state change may affect the goal (see state_keys)
+        self.depends_on: Optional[FrozenSet[str]] = (
+            frozenset(depends_on) if depends_on is not None else None
+        )
+
+    @property
+    def urgency_fn(self) -> Callable[[float], float]:
+        return self._urgency_fn
+
+    @urgency_fn.setter
+    def urgency_fn(self, urgency_fn: Callable[[float], float]) -> None:
+        self._urgency_fn = urgency_fn
+        # Last (t, urgency_fn(t)) pair, used when pure_urgency is set
+        self._urgency_t: Optional[float] = None
+        self._urgency_v = 0.0
+
+    @property
+    def dependencies(self) -> List['Goal']:
+        return self._dependencies
+
+    @dependencies.setter
+    def dependencies(self, dependencies: List['Goal']) -> None:
+        deps = _DependencyList(dependencies)
+        deps._owner = self
+        self._dependencies = deps
+        self._topology_version += 1
+
+    def compile(self) -> List[PlanStep]:
+        # Flatten the dependency graph below this goal into (goal, dependencies)
+        # pairs, dependencies first, with an iterative DFS. A dependency that is
+        # still on the DFS path closes a cycle, which has no well-defined value,
+        # so it raises ValueError.
+        plan: List[PlanStep] = []
+        done: Set[int] = set()
+        on_path = {id(self)}
+        stack: List[Tuple[Goal, Iterator[Goal], List[Goal]]] = [(self, iter(self.dependencies), [])]
+        while stack:
+            goal, deps, kept = stack[-1]
+            dep = next(deps, None)
+            if dep is None:
+                stack.pop()
+                on_path.discard(id(goal))
+                done.add(id(goal))
+                plan.append((goal, tuple(kept)))
+                continue
+            dep_id = id(dep)
+            if dep_id in on_path:
+                raise ValueError(f"Goal dependencies contain a cycle through {dep.name}")
+            kept.append(dep)
+            if dep_id not in done:
+                on_path.add(dep_id)
+                stack.append((dep, iter(dep.dependencies), []))
+        self._plan = plan
+        self._plan_versions = tuple([goal._topology_version for goal, _ in plan])
+        return plan
+
+    def _current_plan(self) -> List[PlanStep]:
+        # Compiled plan, recompiled if a goal in it has edited its dependencies
+        # since; unrelated graphs keep theirs
+        plan = self._plan
+        if plan is None:
+            return self.compile()
+        for (goal, _), version in zip(plan, self._plan_versions):
+            if goal._topology_version != version:
+                return self.compile()
+        return plan
+
+    def state_keys(self) -> Optional[FrozenSet[str]]:
+        # State keys the effective value reads: the declared depends_on keys plus
+        # those used by trait modulation, over this goal and its dependencies.
+        # None if any goal in the graph leaves depends_on undeclared.
+        plan = self._current_plan()
+        keys: Set[str] = set()
+        for goal, _ in plan:
+            if goal.depends_on is None:
+                return None
+            keys |= goal.depends_on
+            for bit, trait_keys in _TRAIT_BIT_STATE_KEYS:
+                if goal._current_trait_mask() & bit:
+                    keys |= trait_keys
+        return frozenset(keys)
+
+    @property
+    def traits(self) -> TraitSet:
+        return self._traits
+
+    @traits.setter
+    def traits(self, traits: TraitSet) -> None:
+        self._traits = traits
+        self._pack_traits()
+
+    def _pack_traits(self) -> int:
+        # Packed once per TraitSet version so value computations test one int
+        # instead of the set
+        traits = self._traits
+        mask = 0
+        for name in traits.traits:
+            mask |= _TRAIT_BITS.get(name, 0)
+        self._trait_mask = mask
+        self._trait_version = traits._version
+        return mask
+
+    def _current_trait_mask(self) -> int:
+        # Trait mask, repacked if the TraitSet was edited in place since
+        if self._traits._version != self._trait_version:
+            return self._pack_traits()
+        return self._trait_mask
+
+    def begin_tick(self) -> None:
+        # Enable (or reset) the per-tick cache: until end_tick, repeated calls
+        # with the same t and state object reuse the first result, so the state
+        # must not be mutated in between
+        self._tick_cache = {}
+
+    def end_tick(self) -> None:
+        # Disable the per-tick cache again, so later callers see live values
+        self._tick_cache = None
+
     def urgency(self, t: float, state: Optional[Dict] = None) -> float:
-        base = self.urgency_fn(t)
+        tick_cache = self._tick_cache
+        if tick_cache is not None:
+            key = ('urgency', t, id(state))
+            cached = tick_cache.get(key)
+            if cached is None:
+                cached = _tick_store(tick_cache, key, state, self._urgency(t, state))
+            return cached
+        return self._urgency(t, state)
 
-        if self.traits.has_trait(URGENCY_SENSITIVE):
+    def _urgency(self, t: float, state: Optional[Dict]) -> float:
+        if not self.pure_urgency:
+            base = self._urgency_fn(t)
+        elif t == self._urgency_t:
+            base = self._urgency_v
+        else:
+            base = self._urgency_v = self._urgency_fn(t)
+            self._urgency_t = t
+
+        mask = self._current_trait_mask()
+        if not mask:
+            # No-trait fast path: nothing modulates urgency
+            return base
+
+        if mask & URGENCY_SENSITIVE_BIT:
             time_factor = 1.0 + 0.5 * (1.0 - base)
             base *= time_factor
 
-        if self.traits.has_trait(RISK_AVERSE):
+        if mask & RISK_AVERSE_BIT:
             risk = state.get("risk", 0.0) if state else 0.0
             base *= max(0.1, 1.0 - risk)
 
         return base
 
     def utility(self, state: Dict) -> float:
+        tick_cache = self._tick_cache
+        if tick_cache is not None:
+            key = ('utility', id(state))
+            cached = tick_cache.get(key)
+            if cached is None:
+                cached = _tick_store(tick_cache, key, state, self._utility(state))
+            return cached
+        return self._utility(state)
+
+    def _utility(self, state: Dict) -> float:
         base = self.utility_fn(state)
 
-        if self.traits.has_trait(EXPLORATORY):
+        mask = self._current_trait_mask()
+        if not mask:
+            return base
+
+        if mask & EXPLORATORY_BIT:
             novelty = state.get("novelty", 0.5)
             base *= 1.0 + 0.5 * novelty
 
-        if self.traits.has_trait(RISK_AVERSE):
+        if mask & RISK_AVERSE_BIT:
             safety = state.get("safety_level", 1.0)
             base *= safety
 
         return base
 
-    def dependency_value(self, t: float, state: Dict) -> float:
+    def get_trait_value(self, name: str) -> Optional[float]:
+        # Weight of the named trait, or None if the goal does not carry it
+        trait = self.traits.traits.get(name)
+        return trait.weight if trait is not None else None
+
+    def dependency_value(self, t: float, state: Dict, memo: Optional[Dict[int, float]] = None) -> float:
         if not self.dependencies:
             return 0.0
-        dep_values = [dep.effective_value(t, state) for dep in self.dependencies]
+        dep_values = [dep.effective_value(t, state, memo) for dep in self.dependencies]
         return sum(dep_values) / len(dep_values)
 
     def base_effective_value(self, t: float, state: Dict) -> float:
         return self.urgency(t, state) * self.utility(state)
 
-    def effective_value(self, t: float, state: Dict) -> float:
-        base = self.base_effective_value(t, state)
-        dep_bonus = self.dependency_value(t, state)
+    def effective_value(self, t: float, state: Dict, memo: Optional[Dict[int, float]] = None) -> float:
+        # memo maps id(goal) -> value for one (t, state); sharing it across calls
+        # evaluates every goal of a dependency graph once instead of once per path
+        if memo is None:
+            memo = {}
+        else:
+            cached = memo.get(id(self))
+            if cached is not None:
+                return cached
+
+        plan = self._current_plan()
+
+        # Flat sweep over the compiled plan: every dependency is valued before
+        # the goals that depend on it
+        key = ('effective_value', t, id(state))
+        for goal, deps in plan:
+            goal_id = id(goal)
+            if goal_id in memo:
+                continue
+            tick_cache = goal._tick_cache
+            if tick_cache is not None:
+                value = tick_cache.get(key)
+                if value is not None:
+                    memo[goal_id] = value
+                    continue
+            if deps:
+                dep_bonus = sum([memo[id(dep)] for dep in deps]) / len(deps)
+            else:
+                dep_bonus = 0.0
+            value = goal._node_value(t, state, dep_bonus)
+            memo[goal_id] = value
+            if tick_cache is not None:
+                _tick_store(tick_cache, key, state, value)
+        return memo[id(self)]
+
+    def _node_value(self, t: float, state: Dict, dep_bonus: float) -> float:
+        # Own value of this goal given the mean value of its dependencies
+        return self._compute(self.urgency(t, state), self.utility(state), dep_bonus, state)
+
+    def _compute(self, urgency: float, utility: float, dep_bonus: float, state: Dict) -> float:
+        # Effective value from already computed urgency, utility and dependency bonus
+        base = urgency * utility
+
+        mask = self._current_trait_mask()
+        if not mask:
+            return base + dep_bonus
 
         trait_mod = 0.0
 
-        if self.traits.has_trait(URGENCY_SENSITIVE):
+        if mask & URGENCY_SENSITIVE_BIT:
             trait_mod += 0.1 * base
 
-        if self.traits.has_trait(RISK_AVERSE):
+        if mask & RISK_AVERSE_BIT:
             risk = state.get("risk", 0.0)
             trait_mod -= 0.2 * risk * base
 
-        if self.traits.has_trait(EXPLORATORY):
+        if mask & EXPLORATORY_BIT:
             novelty = state.get("novelty", 0.5)
             trait_mod += 0.15 * novelty * base
 
         return base + dep_bonus + trait_mod
 
     def describe(self, t: float, state: Dict) -> str:
+        tick_cache = self._tick_cache
+        if tick_cache is not None:
+            # Formatting is the costly part, so the text is cached per tick too
+            key = ('describe', t, id(state))
+            cached = tick_cache.get(key)
+            if cached is None:
+                cached = _tick_store(tick_cache, key, state, self._describe(t, state))
+            return cached
+        return self._describe(t, state)
+
+    def _describe(self, t: float, state: Dict) -> str:
         urgency_val = self.urgency(t, state)
         utility_val = self.utility(state)
         base = urgency_val * utility_val
-        dep_bonus = self.dependency_value(t, state)
-        final = self.effective_value(t, state)
+        dep_bonus = self.dependency_value(t, state, {})
+        final = self._compute(urgency_val, utility_val, dep_bonus, state)
 
         # Defensive trait extraction
         traits_list = 'None'
@@ -118,3 +408,37 @@ def curiosity_utility(state: Dict) -> float:
 
 def safety_utility(state: Dict) -> float:
     return state.get('safety_level', 1.0)
+
+# --- Example Goal Tree ---
+
+def example_goal_tree() -> Goal:
+    explore = Goal("Explore", linear_urgency, curiosity_utility, traits=[EXPLORATORY], depends_on={"novelty"})
+    survive = Goal("Survive", linear_urgency, safety_utility, traits=[RISK_AVERSE], depends_on={"safety_level"})
+    return Goal("MasterGoal", linear_urgency, lambda s: 0.5, dependencies=[explore, survive], depends_on=())
+
+# --- Constant-Utility Goals ---
+
+class ConstantUtilityGoal(Goal):
+    """Goal with a fixed utility, e.g. an idle fallback; skips the utility callable."""
+
+    __slots__ = ('_const_value',)
+
+    def __init__(
+        self,
+        name: str,
+        value: float,
+        urgency_fn: Callable[[float], float] = linear_urgency,
+        dependencies: Optional[List['Goal']] = None,
+        traits: Optional[Union[TraitSet, List[Trait]]] = None,
+        depends_on: Iterable[str] = (),
+        pure_urgency: bool = False
+    ):
+        # The constant utility reads no state, so no keys are declared by default
+        super().__init__(name, urgency_fn, lambda state: value, dependencies, traits, depends_on, pure_urgency)
+        self._const_value = value
+
+    def utility(self, state: Dict) -> float:
+        if not self._current_trait_mask() & (EXPLORATORY_BIT | RISK_AVERSE_BIT):
+            # No trait modulation applies, so the utility is the constant itself
+            return self._const_value
+        return super().utility(state)
@@ -1,10 +1,34 @@
 import time
-from goalModule import example_goal_tree
+from core.goalModule import example_goal_tree
+from core.arbitrator import GoalArbitrator
 
-def run_scheduler(ticks=10, delay=0.5):
+def run_tick(goals, arbitrator, t, state, verbose=True):
+    # One arbitration tick, kept apart from the pacing sleep so profiles of the
+    # scheduler attribute time to arbitration and sleeping separately
+    arbitrator.begin_tick()
+    try:
+        # Dependencies shared between goals are evaluated once through the common memo
+        memo = {}
+        values = [g.effective_value(t, state, memo) for g in goals]
+        top = goals[values.index(max(values))]
+
+        if verbose:
+            # Full ranked listing only when requested; selection itself needs no sort
+            for i in sorted(range(len(goals)), key=values.__getitem__, reverse=True):
+                g = goals[i]
+                print(f"{g.name}: urgency={g.urgency(t):.2f}, utility={g.utility(state):.2f}, "
+                      f"eff={values[i]:.2f}")
+    finally:
+        # The cache is only valid for this tick's state
+        arbitrator.end_tick()
+
+    return top
+
+def run_scheduler(ticks=10, delay=0.5, verbose=True):
     state = {"novelty": 0.8, "danger": 0.3}
     master_goal = example_goal_tree()
     goals = [master_goal] + master_goal.dependencies
+    arbitrator = GoalArbitrator(goals)
 
     print("Initial goals:")
     for g in goals:
@@ -12,20 +36,11 @@ def run_scheduler(ticks=10, delay=0.5):
 
     for t in range(ticks):
         print(f"\n--- Tick {t} ---")
-        sorted_goals = sorted(
-            goals,
-            key=lambda g: g.effective_value(t, state),
-            reverse=True
-        )
-        top = sorted_goals[0]
-
-        for g in sorted_goals:
-            print(f"{g.name}: urgency={g.urgency(t):.2f}, utility={g.utility(state):.2f}, "
-                  f"eff={g.effective_value(t, state):.2f}")
-
+        top = run_tick(goals, arbitrator, t, state, verbose)
         print(f"Selected Goal: {top.name}  ← Highest EV")
 
-        time.sleep(delay)
+        if delay:
+            time.sleep(delay)
 
 if __name__ == "__main__":
     run_scheduler(ticks=20)
@@ -1,8 +1,12 @@
-from typing import Any, List
+import sys
+from typing import Any, Callable, Dict, List, Optional
 
 class Trait:
+    __slots__ = ('name', 'weight')
+
     def __init__(self, name: str, weight: float):
-        self.name = name
+        # Interned: trait names key every TraitSet and are looked up per evaluation
+        self.name = sys.intern(name)
         self.weight = weight
 
     def __repr__(self):
@@ -13,10 +17,47 @@ URGENCY_SENSITIVE = Trait("URGENCY_SENSITIVE", 1.0)
 RISK_AVERSE = Trait("RISK_AVERSE", 1.0)
 EXPLORATORY = Trait("EXPLORATORY", 1.0)
 
+def _edits_traits(method: Callable[..., Any]) -> Callable[..., Any]:
+    def wrapper(self: '_TraitDict', *args: Any, **kwargs: Any) -> Any:
+        result = method(self, *args, **kwargs)
+        self._owner._version += 1
+        return result
+    return wrapper
+
+class _TraitDict(dict):
+    # Name -> trait mapping that bumps its TraitSet's version when edited in
+    # place, so values packed from it (e.g. Goal trait masks) are refreshed
+    __slots__ = ('_owner',)
+    _owner: 'TraitSet'
+
+    __setitem__ = _edits_traits(dict.__setitem__)
+    __delitem__ = _edits_traits(dict.__delitem__)
+    __ior__ = _edits_traits(dict.__ior__)
+    pop = _edits_traits(dict.pop)
+    popitem = _edits_traits(dict.popitem)
+    clear = _edits_traits(dict.clear)
+    update = _edits_traits(dict.update)
+    setdefault = _edits_traits(dict.setdefault)
+
 class TraitSet:
+    __slots__ = ('_traits', '_version')
+
     def __init__(self, traits: List[Trait]):
+        # Bumped whenever the traits are edited or replaced
+        self._version = 0
         self.traits = {trait.name: trait for trait in traits}
 
+    @property
+    def traits(self) -> Dict[str, Trait]:
+        return self._traits
+
+    @traits.setter
+    def traits(self, traits: Dict[str, Trait]) -> None:
+        wrapped = _TraitDict(traits)
+        wrapped._owner = self
+        self._traits = wrapped
+        self._version += 1
+
     def get_weight(self, name: str) -> float:
         return self.traits.get(name, Trait(name, 0.0)).weight
 
@@ -26,17 +67,64 @@ class TraitSet:
     def __repr__(self):
         return f"TraitSet({list(self.traits.values())})"
 
+class SoftmaxTemperature:
+    # Validated softmax temperature for the arbitrators. Its reciprocal is
+    # cached on assignment so softmax multiplies by 1/T instead of dividing
+    # once per goal.
+    _temperature: float
+    _inv_temperature: float
+
+    @property
+    def temperature(self) -> float:
+        return self._temperature
+
+    @temperature.setter
+    def temperature(self, value: float) -> None:
+        if value <= 0:
+            raise ValueError(f"Softmax temperature must be positive, got {value}")
+        self._temperature = value
+        self._inv_temperature = 1.0 / value
+
 class Goal:
+    __slots__ = (
+        'name', 'urgency_fn', 'utility_fn',
+        '_urgency_state', '_urgency_version', '_urgency_value',
+        '_utility_state', '_utility_version', '_utility_value',
+    )
+
     def __init__(self, name: str, urgency_fn, utility_fn):
-        self.name = name
+        self.name = sys.intern(name)
         self.urgency_fn = urgency_fn
         self.utility_fn = utility_fn
+        # Last state object and version seen by each compute method, and its
+        # result. The state itself is held and compared by identity: an id()
+        # could be reused by a new state once the old one is freed.
+        self._urgency_state: Any = None
+        self._urgency_version: Optional[int] = None
+        self._urgency_value = 0.0
+        self._utility_state: Any = None
+        self._utility_version: Optional[int] = None
+        self._utility_value = 0.0
 
-    def compute_urgency(self, state: Any) -> float:
-        return self.urgency_fn(state)
+    def compute_urgency(self, state: Any, version: Optional[int] = None) -> float:
+        # With the state's version (e.g. CognitiveState.version()), repeated calls
+        # for an unchanged state reuse the previous result
+        if version is None:
+            return self.urgency_fn(state)
+        if state is not self._urgency_state or version != self._urgency_version:
+            self._urgency_value = self.urgency_fn(state)
+            self._urgency_state = state
+            self._urgency_version = version
+        return self._urgency_value
 
-    def compute_utility(self, state: Any) -> float:
-        return self.utility_fn(state)
+    def compute_utility(self, state: Any, version: Optional[int] = None) -> float:
+        if version is None:
+            return self.utility_fn(state)
+        if state is not self._utility_state or version != self._utility_version:
+            self._utility_value = self.utility_fn(state)
+            self._utility_state = state
+            self._utility_version = version
+        return self._utility_value
 
     def __repr__(self):
         return f"Goal(name={self.name})"
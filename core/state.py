@@ -6,9 +6,12 @@ Holds the current context, environmental data, and internal variables
 that define the active cognitive landscape for goal evaluation and arbitration.
 """
 
-from typing import Dict, Any, Callable, List
 import copy
-import time
+import pickle
+from collections import deque
+from typing import Deque, Dict, Any, Callable, Hashable, Union
+import types
+import weakref
 
 
 class CognitiveState:
@@ -18,18 +21,31 @@ class CognitiveState:
     Supports state snapshots and event listeners.
     """
 
-    def __init__(self):
+    __slots__ = ('_state_data', '_history', '_listeners', '_change_listeners', '_version', '__weakref__')
+
+    def __init__(self, history_limit: int = 128):
         # Core storage of state variables
         self._state_data: Dict[str, Any] = {}
 
-        # History snapshots of state for rollback or analysis
-        self._history: List[Dict[str, Any]] = []
+        # History snapshots of state for rollback or analysis, as a ring buffer
+        # that evicts the oldest snapshot once history_limit is reached
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_limit)
+
+        # Event listeners to trigger callbacks on state change. Dicts keep
+        # insertion order, so notification order is registration order, and make
+        # registration checks O(1). Strong listeners are keyed by the callback
+        # itself (equality, so re-fetched bound methods still match); weak ones by
+        # the identity of what they reference, holding a weakref as the value.
+        # Unhashable callbacks are keyed by identity (see _strong_listener_key).
+        self._listeners: Dict[Hashable, Union[Callable[[Dict[str, Any]], None], weakref.ref]] = {}
 
-        # Event listeners to trigger callbacks on state change
-        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # Listeners that also receive the entries a change touched, keyed like
+        # the strong listeners above
+        self._change_listeners: Dict[Hashable, Callable[[Dict[str, Any], Dict[str, Any]], None]] = {}
 
-        # Timestamp of last update
-        self._last_updated: float = time.time()
+        # Bumped on every change, so consumers can cache results per version and
+        # order updates; it doubles as last_updated without a clock read per change
+        self._version: int = 0
 
     def get(self, key: str, default=None):
         """Retrieve a value from the state."""
@@ -38,48 +54,161 @@ class CognitiveState:
     def set(self, key: str, value: Any):
         """Set or update a value in the state and notify listeners."""
         self._state_data[key] = value
-        self._last_updated = time.time()
-        self._notify_listeners()
+        self._version += 1
+        # Most states have no listeners; skip the notify call entirely then
+        if self._listeners or self._change_listeners:
+            self._notify_listeners({key: value})
 
     def update(self, data: Dict[str, Any]):
         """Bulk update multiple state entries and notify listeners."""
         self._state_data.update(data)
-        self._last_updated = time.time()
-        self._notify_listeners()
-
-    def snapshot(self):
-        """Take a snapshot of the current state and save to history."""
-        snap = copy.deepcopy(self._state_data)
+        self._version += 1
+        if self._listeners or self._change_listeners:
+            self._notify_listeners(dict(data))
+
+    def snapshot(self, deep: bool = False):
+        """
+        Take a snapshot of the current state and save to history.
+
+        Only the latest history_limit snapshots are kept.
+
+        The snapshot shares its values with the live state instead of deep-copying
+        them: the current dict is frozen into the history and the state continues
+        on a shallow copy. Stored values must therefore be treated as immutable;
+        replace them through set/update rather than mutating them in place.
+        Pass deep=True to store an independent deep copy instead, for state
+        holding nested structures that are mutated in place.
+        """
+        if deep:
+            snap = _deep_copy(self._state_data)
+            self._history.append(snap)
+            return snap
+        snap = self._state_data
+        self._state_data = dict(snap)
         self._history.append(snap)
         return snap
 
-    def rollback(self, index: int = -1):
-        """Rollback to a previous snapshot by index (default latest)."""
+    def rollback(self, index: int = -1, deep: bool = False):
+        """
+        Rollback to a previous snapshot by index (default latest).
+
+        With deep=True the restored values are deep copies, so mutating them in
+        place leaves the snapshot intact for later rollbacks.
+        """
         if not self._history:
             raise IndexError("No snapshots available for rollback.")
         snap = self._history[index]
-        self._state_data = copy.deepcopy(snap)
-        self._last_updated = time.time()
-        self._notify_listeners()
-
-    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
-        """Register a callback to be called on state change."""
-        if callback not in self._listeners:
-            self._listeners.append(callback)
+        # Shallow copy: the snapshot stays intact when the state is modified again
+        self._state_data = _deep_copy(snap) if deep else dict(snap)
+        self._version += 1
+        if self._listeners or self._change_listeners:
+            # Any entry may differ after a rollback, so report the whole state
+            self._notify_listeners(self._state_data)
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None], weak: bool = False):
+        """
+        Register a callback to be called on state change.
+
+        With weak=True the state only holds a weak reference, so registering does
+        not keep the callback (or the object of a bound method) alive; it is
+        dropped once collected. Builtins and other callables that cannot be
+        weakly referenced usefully are held strongly instead.
+        """
+        # A builtin bound method is a fresh object that would die immediately
+        if not weak or isinstance(callback, types.BuiltinMethodType):
+            self._listeners.setdefault(_strong_listener_key(callback), callback)
+            return
+        key = _weak_listener_key(callback)
+        if key in self._listeners:
+            return
+        listeners = self._listeners
+
+        def _drop(ref, key=key):
+            # Purge the entry as soon as the callback is collected
+            if listeners.get(key) is ref:
+                del listeners[key]
+
+        ref: weakref.ref
+        try:
+            if hasattr(callback, '__func__'):
+                ref = weakref.WeakMethod(callback, _drop)
+            else:
+                ref = weakref.ref(callback, _drop)
+        except TypeError:
+            self._listeners.setdefault(_strong_listener_key(callback), callback)
+            return
+        listeners[key] = ref
 
     def remove_listener(self, callback: Callable[[Dict[str, Any]], None]):
         """Unregister a previously registered callback."""
-        if callback in self._listeners:
-            self._listeners.remove(callback)
+        self._listeners.pop(_strong_listener_key(callback), None)
+        self._listeners.pop(_weak_listener_key(callback), None)
 
-    def _notify_listeners(self):
-        """Invoke all registered listeners with the current state data."""
-        for callback in self._listeners:
-            callback(self._state_data)
+    def add_change_listener(self, callback: Callable[[Dict[str, Any], Dict[str, Any]], None]):
+        """
+        Register a callback to be called on state change with the changed entries.
+
+        The callback receives (changed, full_state), where changed maps just the
+        keys the change set to their new values, so listeners interested in a few
+        keys need not scan the whole state.
+        """
+        self._change_listeners.setdefault(_strong_listener_key(callback), callback)
 
-    def last_updated(self):
-        """Return timestamp of the last state update."""
-        return self._last_updated
+    def remove_change_listener(self, callback: Callable[[Dict[str, Any], Dict[str, Any]], None]):
+        """Unregister a previously registered change listener."""
+        self._change_listeners.pop(_strong_listener_key(callback), None)
+
+    def _notify_listeners(self, changed: Dict[str, Any]):
+        """Invoke all registered listeners with the current state data."""
+        data = self._state_data
+        # Iterate over copies so listeners may add or remove listeners
+        for listener in tuple(self._listeners.values()):
+            callback = listener() if isinstance(listener, weakref.ref) else listener
+            if callback is not None:
+                callback(data)
+        for change_callback in tuple(self._change_listeners.values()):
+            change_callback(changed, data)
+
+    def version(self) -> int:
+        """Return a counter that changes whenever the state changes."""
+        return self._version
+
+    def last_updated(self) -> int:
+        """
+        Return a logical timestamp of the last state update.
+
+        This is the mutation counter rather than wall-clock time: it increases
+        with every change, so it orders updates but does not date them.
+        """
+        return self._version
 
     def __repr__(self):
-        return f"CognitiveState(state_data={self._state_data}, last_updated={self._last_updated})"
+        return f"CognitiveState(state_data={self._state_data}, last_updated={self._version})"
+
+
+def _deep_copy(data: Dict[str, Any]) -> Dict[str, Any]:
+    # A pickle round trip runs in C and beats deepcopy's per-object dispatch for
+    # plain dict/list/primitive graphs; deepcopy covers anything unpicklable
+    try:
+        return pickle.loads(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return copy.deepcopy(data)
+
+
+def _strong_listener_key(callback: Callable) -> Hashable:
+    # Strong listeners are keyed by the callback itself, by equality; callables
+    # that cannot be hashed (e.g. dataclass instances with __call__) fall back
+    # to their identity, which stays valid since the entry holds the callback
+    try:
+        hash(callback)
+    except TypeError:
+        return ('strong', id(callback))
+    return callback
+
+
+def _weak_listener_key(callback: Callable) -> Hashable:
+    # Identity of what a weak listener refers to: bound methods are recreated on
+    # every attribute access, so they are keyed by their object and function
+    if hasattr(callback, '__func__') and hasattr(callback, '__self__'):
+        return ('weak', id(callback.__self__), id(callback.__func__))
+    return ('weak', id(callback))
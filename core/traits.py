@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
 
 from core.shared_types import Trait, TraitSet
 
+if TYPE_CHECKING:
+    from core.goalModule import Goal
 
 
 class GoalTrait(ABC):
@@ -11,11 +13,15 @@ class GoalTrait(ABC):
     Traits may affect urgency, utility, and final value based on context, dependencies, or internal logic.
     """
 
-    def adjust_urgency(self, base_urgency: float, *, t: float, goal: Goal) -> float:
+    # The built-in traits declare their fields as slots; subclasses without
+    # __slots__ still get an instance dict as usual
+    __slots__ = ()
+
+    def adjust_urgency(self, base_urgency: float, *, t: float, goal: 'Goal') -> float:
         """Override to modulate urgency dynamically."""
         return base_urgency
 
-    def adjust_utility(self, base_utility: float, *, state: Dict, goal: Goal) -> float:
+    def adjust_utility(self, base_utility: float, *, state: Dict, goal: 'Goal') -> float:
         """Override to modulate utility dynamically."""
         return base_utility
 
@@ -26,10 +32,10 @@ class GoalTrait(ABC):
         base: float,
         urgency: float,
         utility: float,
-        dependencies: List[Goal],
+        dependencies: List['Goal'],
         dep_value: float,
         state: Dict,
-        goal: Goal,
+        goal: 'Goal',
         t: float
     ) -> float:
         """
@@ -48,8 +54,13 @@ class GreedyTrait(GoalTrait):
     Used in agents that prioritize value-rich actions regardless of time pressure.
     """
 
+    __slots__ = ()
+
+    UTILITY_WEIGHT = 0.2
+    URGENCY_WEIGHT = 0.05
+
     def modify(self, *, base, urgency, utility, dependencies, dep_value, state, goal, t):
-        return 0.2 * (utility ** 2) - 0.05 * urgency
+        return self.UTILITY_WEIGHT * (utility ** 2) - self.URGENCY_WEIGHT * urgency
 
 
 class DependencyAmplifierTrait(GoalTrait):
@@ -58,19 +69,40 @@ class DependencyAmplifierTrait(GoalTrait):
     Useful for hierarchical or bundle-linked tasks.
     """
 
+    __slots__ = ()
+
+    WEIGHT = 0.1
+
     def modify(self, *, base, urgency, utility, dependencies, dep_value, state, goal, t):
-        return 0.1 * dep_value
+        return self.WEIGHT * dep_value
 
 
 class TimeDecayTrait(GoalTrait):
     """
     Applies exponential decay to urgency over time.
     Models fatigue or temporal irrelevance.
+
+    The decay factor is cached for the last t; when t advances by exactly one
+    step, as in a tick loop, it is updated with one multiply instead of a pow.
     """
 
+    __slots__ = ('_last_t', '_decay')
+
+    RATE = 0.95
+
+    def __init__(self):
+        self._last_t: Optional[float] = None
+        self._decay = 1.0
+
     def adjust_urgency(self, base_urgency, *, t, goal):
-        decay_factor = 0.95 ** t
-        return base_urgency * decay_factor
+        last_t = self._last_t
+        if t != last_t:
+            if last_t is not None and t == last_t + 1:
+                self._decay *= self.RATE
+            else:
+                self._decay = self.RATE ** t
+            self._last_t = t
+        return base_urgency * self._decay
 
     def modify(self, *, base, urgency, utility, dependencies, dep_value, state, goal, t):
         return 0.0  # All modulation handled via adjust_urgency
@@ -82,6 +114,8 @@ class StateBoostTrait(GoalTrait):
     Example: increase value if 'energy' > 0.8 or 'mood' is 'happy'.
     """
 
+    __slots__ = ('key', 'threshold', 'boost')
+
     def __init__(self, key: str, threshold: float, boost: float):
         self.key = key
         self.threshold = threshold
@@ -99,6 +133,8 @@ class EntropicStabilizerTrait(GoalTrait):
     Assumes state includes a moving window of previous values (e.g., in a larger framework).
     """
 
+    __slots__ = ()
+
     def modify(self, *, base, urgency, utility, dependencies, dep_value, state, goal, t):
         volatility = state.get('volatility', {}).get(goal.name, 0.0)
         return -0.1 * volatility
@@ -109,9 +145,14 @@ class UrgencyClamperTrait(GoalTrait):
     Caps urgency to avoid frantic goal pursuit.
     """
 
+    __slots__ = ()
+
     def adjust_urgency(self, base_urgency, *, t, goal):
         return min(base_urgency, 1.0)
 
+    def modify(self, *, base, urgency, utility, dependencies, dep_value, state, goal, t):
+        return 0.0  # Clamping happens in adjust_urgency
+
 
 class RecursiveRewardTrait(GoalTrait):
     """
@@ -119,33 +160,127 @@ class RecursiveRewardTrait(GoalTrait):
     Encourages stable recursive habits and behavioral convergence.
     """
 
+    __slots__ = ()
+
     def modify(self, *, base, urgency, utility, dependencies, dep_value, state, goal, t):
         success_count = state.get('success_history', {}).get(goal.name, 0)
         return 0.05 * success_count
 
 
+def _refolds(method: Callable[..., Any]) -> Callable[..., Any]:
+    def wrapper(self: '_TraitList', *args: Any, **kwargs: Any) -> Any:
+        result = method(self, *args, **kwargs)
+        self._stack._fold()
+        return result
+    return wrapper
+
+
+class _TraitList(list):
+    # List of a TraitStack's traits that refolds the stack when edited in place
+    __slots__ = ('_stack',)
+
+    def __init__(self, traits: Iterable[GoalTrait], stack: 'TraitStack'):
+        super().__init__(traits)
+        self._stack = stack
+
+    append = _refolds(list.append)
+    extend = _refolds(list.extend)
+    insert = _refolds(list.insert)
+    remove = _refolds(list.remove)
+    pop = _refolds(list.pop)
+    clear = _refolds(list.clear)
+    sort = _refolds(list.sort)
+    reverse = _refolds(list.reverse)
+    __setitem__ = _refolds(list.__setitem__)
+    __delitem__ = _refolds(list.__delitem__)
+    __iadd__ = _refolds(list.__iadd__)
+
+
 class TraitStack(GoalTrait):
     """
     Combines multiple traits into a unified trait object.
     Allows arbitrarily composable behavior.
+
+    The built-in traits with purely numeric modify() terms are folded into
+    coefficients when the stack is built, so modify() evaluates them as one
+    expression instead of one call each; other traits are still called.
+    The traits list is copied into one that refolds whenever it is edited in
+    place; state-boost fields are read live at evaluation time.
     """
 
+    __slots__ = (
+        '_traits', '_utility_sq_coeff', '_urgency_coeff', '_dep_coeff', '_boosts',
+        '_modifiers', '_urgency_adjusters', '_utility_adjusters',
+    )
+
     def __init__(self, traits: List[GoalTrait]):
         self.traits = traits
 
+    @property
+    def traits(self) -> List[GoalTrait]:
+        return self._traits
+
+    @traits.setter
+    def traits(self, traits: List[GoalTrait]) -> None:
+        self._traits = _TraitList(traits, self)
+        self._fold()
+
+    def _fold(self) -> None:
+        traits = self._traits
+        greedy = 0
+        dep_amplifiers = 0
+        boosts: List[StateBoostTrait] = []
+        others: List[GoalTrait] = []
+        for trait in traits:
+            # Exact type checks: subclasses may override modify()
+            kind = type(trait)
+            if kind is GreedyTrait:
+                greedy += 1
+            elif kind is DependencyAmplifierTrait:
+                dep_amplifiers += 1
+            elif kind is StateBoostTrait:
+                boosts.append(trait)
+            elif kind is not TimeDecayTrait:
+                # TimeDecayTrait.modify is always 0.0 and needs no evaluation
+                others.append(trait)
+        self._utility_sq_coeff = greedy * GreedyTrait.UTILITY_WEIGHT
+        self._urgency_coeff = -greedy * GreedyTrait.URGENCY_WEIGHT
+        self._dep_coeff = dep_amplifiers * DependencyAmplifierTrait.WEIGHT
+        self._boosts = tuple(boosts)
+        # Hooks are bound once here so evaluation skips the per-trait lookups.
+        # Only traits that override an adjustment hook take part in it; the
+        # inherited GoalTrait hooks return their input unchanged
+        self._modifiers = tuple(trait.modify for trait in others)
+        self._urgency_adjusters = tuple(
+            trait.adjust_urgency for trait in traits
+            if type(trait).adjust_urgency is not GoalTrait.adjust_urgency
+        )
+        self._utility_adjusters = tuple(
+            trait.adjust_utility for trait in traits
+            if type(trait).adjust_utility is not GoalTrait.adjust_utility
+        )
+
     def adjust_urgency(self, base_urgency, *, t, goal):
-        for trait in self.traits:
-            base_urgency = trait.adjust_urgency(base_urgency, t=t, goal=goal)
+        for adjust in self._urgency_adjusters:
+            base_urgency = adjust(base_urgency, t=t, goal=goal)
         return base_urgency
 
     def adjust_utility(self, base_utility, *, state, goal):
-        for trait in self.traits:
-            base_utility = trait.adjust_utility(base_utility, state=state, goal=goal)
+        for adjust in self._utility_adjusters:
+            base_utility = adjust(base_utility, state=state, goal=goal)
         return base_utility
 
     def modify(self, *, base, urgency, utility, dependencies, dep_value, state, goal, t):
-        return sum(
-            trait.modify(
+        total = (
+            self._utility_sq_coeff * (utility ** 2)
+            + self._urgency_coeff * urgency
+            + self._dep_coeff * dep_value
+        )
+        for boost in self._boosts:
+            if state.get(boost.key, 0) >= boost.threshold:
+                total += boost.boost
+        for modify in self._modifiers:
+            total += modify(
                 base=base,
                 urgency=urgency,
                 utility=utility,
@@ -154,5 +289,5 @@ class TraitStack(GoalTrait):
                 state=state,
                 goal=goal,
                 t=t
-            ) for trait in self.traits
-        )
+            )
+        return total
@@ -11,18 +11,28 @@ master = Goal("MasterGoal", linear_urgency, lambda s: 0.5, traits=[], dependenci
 
 all_goals = [master, explore, survive]
 
+# Indent prefixes per recursion depth, and the same after a newline for
+# indenting multi-line descriptions
+_INDENTS = ["  " * depth for depth in range(32)]
+_LINE_INDENTS = ["\n" + indent for indent in _INDENTS]
+
 def execute_goal(goal: Goal, t: float, state: CognitiveState, arbitrator: GoalArbitrator, depth=0):
-    indent = "  " * depth
+    if depth < len(_INDENTS):
+        indent, line_indent = _INDENTS[depth], _LINE_INDENTS[depth]
+    else:
+        indent = "  " * depth
+        line_indent = "\n" + indent
     print(f"{indent}→ Selected Goal: {goal.name}")
-    print(f"{indent}{goal.describe(t, state._state_data).replace(chr(10), chr(10) + indent)}")
+    desc = goal.describe(t, state._state_data)
+    print(f"{indent}{desc.replace(chr(10), line_indent)}")
     urgency_val = goal.urgency(t, state._state_data)
     utility_val = goal.utility(state._state_data)
     print(f"{indent}  Urgency: {urgency_val:.3f}, Utility: {utility_val:.3f}")
 
     if goal.dependencies:
         print(f"{indent}↳ Resolving dependencies of '{goal.name}'...")
-        # Filter dependencies from arbitrator's goals
-        subgoals = [g for g in arbitrator.goals if g.name in [d.name for d in goal.dependencies]]
+        # Look dependencies up among the arbitrator's goals by name
+        subgoals = [g for d in goal.dependencies if (g := arbitrator.get_goal(d.name)) is not None]
         sub_arbitrator = GoalArbitrator(subgoals)
         selected_subgoal = sub_arbitrator.select_goal(t, state._state_data)
         if selected_subgoal:
@@ -56,11 +66,18 @@ def run_full_demo():
         print(f"\n\n=== Time Step {step} (t = {t:.1f}) ===")
         print(f"Current State: {state._state_data}")
 
-        selected_goal = arbitrator.select_goal(t, state._state_data)
-        if selected_goal:
-            execute_goal(selected_goal, t, state, arbitrator)
-        else:
-            print("No goal selected.")
+        # The state is fixed for the whole step, so goals scored here are reused
+        # by the sub-arbitrators while resolving dependencies
+        arbitrator.begin_tick()
+        try:
+            selected_goal = arbitrator.select_goal(t, state._state_data)
+            if selected_goal:
+                execute_goal(selected_goal, t, state, arbitrator)
+            else:
+                print("No goal selected.")
+        finally:
+            # update_state changes the state in place, so the cache ends here
+            arbitrator.end_tick()
 
         update_state(state, step)
         t += 1.0
@@ -1,6 +1,9 @@
+import gc
 import unittest
 import time
+from dataclasses import dataclass, field
 from core.state import CognitiveState
+from core.shared_types import Goal
 
 
 
@@ -10,8 +13,8 @@ class TestCognitiveState(unittest.TestCase):
 
     def test_initial_empty_state(self):
         self.assertEqual(self.state._state_data, {})
-        self.assertEqual(self.state._history, [])
-        self.assertEqual(self.state._listeners, [])
+        self.assertEqual(list(self.state._history), [])
+        self.assertEqual(self.state._listeners, {})
 
     def test_get_set_value(self):
         self.state.set('foo', 42)
@@ -35,6 +38,38 @@ class TestCognitiveState(unittest.TestCase):
         self.state.rollback()
         self.assertEqual(self.state.get('x'), 10)
 
+    def test_snapshot_isolated_from_later_changes(self):
+        self.state.update({'x': 1, 'y': 2})
+        snap = self.state.snapshot()
+        self.state.set('x', 5)
+        self.assertEqual(snap, {'x': 1, 'y': 2})
+        self.state.rollback()
+        self.state.set('y', 7)
+        self.state.rollback()
+        self.assertEqual(self.state.get('y'), 2)
+        self.assertEqual(snap, {'x': 1, 'y': 2})
+
+    def test_deep_snapshot_survives_in_place_mutation(self):
+        self.state.set('plan', {'steps': [1, 2]})
+        self.state.set('policy', lambda x: x)  # unpicklable, falls back to deepcopy
+        snap = self.state.snapshot(deep=True)
+        self.state.get('plan')['steps'].append(3)
+        self.assertEqual(snap['plan'], {'steps': [1, 2]})
+        for _ in range(2):
+            self.state.rollback(deep=True)
+            self.state.get('plan')['steps'].append(4)
+        self.assertEqual(snap['plan'], {'steps': [1, 2]})
+        self.assertIs(snap['policy'], self.state.get('policy'))
+
+    def test_history_keeps_latest_snapshots(self):
+        state = CognitiveState(history_limit=2)
+        for x in range(4):
+            state.set('x', x)
+            state.snapshot()
+        self.assertEqual([snap['x'] for snap in state._history], [2, 3])
+        state.rollback(0)
+        self.assertEqual(state.get('x'), 2)
+
     def test_rollback_no_snapshot_raises(self):
         with self.assertRaises(IndexError):
             self.state.rollback()
@@ -62,6 +97,63 @@ class TestCognitiveState(unittest.TestCase):
         self.assertEqual(called[-1]['foo'], 123)
         self.assertEqual(called[-1]['bar'], 456)
 
+    def test_bound_method_listener_registered_once(self):
+        class Recorder:
+            def __init__(self):
+                self.calls = 0
+
+            def on_change(self, state_data):
+                self.calls += 1
+
+        recorder = Recorder()
+        self.state.add_listener(recorder.on_change)
+        self.state.add_listener(recorder.on_change)
+        self.state.set('a', 1)
+        self.state.remove_listener(recorder.on_change)
+        self.state.set('a', 2)
+        self.assertEqual(recorder.calls, 1)
+
+    def test_weak_listener_does_not_keep_owner_alive(self):
+        calls = []
+
+        class Recorder:
+            def on_change(self, state_data):
+                calls.append(state_data['a'])
+
+        recorder = Recorder()
+        self.state.add_listener(recorder.on_change, weak=True)
+        self.state.add_listener(recorder.on_change, weak=True)
+        self.state.set('a', 1)
+        del recorder
+        gc.collect()
+        self.assertEqual(self.state._listeners, {})
+        self.state.set('a', 2)
+        self.assertEqual(calls, [1])
+
+        recorder = Recorder()
+        self.state.add_listener(recorder.on_change, weak=True)
+        self.state.remove_listener(recorder.on_change)
+        self.state.add_listener(calls.append, weak=True)  # builtins fall back to strong refs
+        self.state.set('a', 3)
+        self.assertEqual(calls, [1, {'a': 3}])
+
+    def test_change_listener_receives_changed_entries(self):
+        changes = []
+        self.state.set('a', 1)
+
+        def on_change(changed, full_state):
+            changes.append((changed, dict(full_state)))
+
+        self.state.add_change_listener(on_change)
+        self.state.set('b', 2)
+        self.state.update({'a': 3, 'c': 4})
+        self.state.remove_change_listener(on_change)
+        self.state.set('d', 5)
+        self.assertEqual(changes, [
+            ({'b': 2}, {'a': 1, 'b': 2}),
+            ({'a': 3, 'c': 4}, {'a': 3, 'b': 2, 'c': 4}),
+        ])
+
     def test_add_and_remove_listener(self):
         called = []
 
@@ -74,6 +166,29 @@ class TestCognitiveState(unittest.TestCase):
         self.state.set('test', 2)
         self.assertEqual(len(called), 1)  # listener called only once before removal
 
+    def test_unhashable_callable_listeners(self):
+        @dataclass
+        class Recorder:
+            calls: list = field(default_factory=list)
+
+            def __call__(self, *args):
+                self.calls.append(args)
+
+        plain, weak, change = Recorder(), Recorder(), Recorder()
+        self.state.add_listener(plain)
+        self.state.add_listener(plain)
+        self.state.add_listener(weak, weak=True)
+        self.state.add_change_listener(change)
+        self.state.set('a', 1)
+        self.assertEqual(len(plain.calls), 1)
+        self.assertEqual(len(weak.calls), 1)
+        self.assertEqual(change.calls, [({'a': 1}, {'a': 1})])
+        self.state.remove_listener(plain)
+        self.state.remove_listener(weak)
+        self.state.remove_change_listener(change)
+        self.state.set('a', 2)
+        self.assertEqual((len(plain.calls), len(weak.calls), len(change.calls)), (1, 1, 1))
+
     def test_last_updated_changes(self):
         before = self.state.last_updated()
         time.sleep(0.01)
@@ -81,6 +196,37 @@ class TestCognitiveState(unittest.TestCase):
         after = self.state.last_updated()
         self.assertGreater(after, before)
 
+    def test_version_tracks_changes(self):
+        v0 = self.state.version()
+        self.state.set('a', 1)
+        self.state.update({'b': 2})
+        self.assertEqual(self.state.version(), v0 + 2)
+        self.state.snapshot()
+        self.assertEqual(self.state.version(), v0 + 2)
+        self.state.rollback()
+        self.assertEqual(self.state.version(), v0 + 3)
+
+    def test_goal_compute_memoized_per_version(self):
+        calls = []
+        goal = Goal('g', lambda s: calls.append('u') or s.get('a'), lambda s: calls.append('w') or 0.5)
+        self.state.set('a', 0.3)
+        for _ in range(3):
+            self.assertEqual(goal.compute_urgency(self.state, self.state.version()), 0.3)
+            goal.compute_utility(self.state, self.state.version())
+        self.state.set('a', 0.6)
+        self.assertEqual(goal.compute_urgency(self.state, self.state.version()), 0.6)
+        self.assertEqual(calls, ['u', 'w', 'u'])
+
+    def test_goal_compute_memo_not_shared_by_new_states(self):
+        goal = Goal('g', lambda s: s.get('a'), lambda s: s.get('a'))
+        results = []
+        for x in range(50):
+            state = CognitiveState()
+            state.set('a', x)
+            results.append((goal.compute_urgency(state, state.version()), goal.compute_utility(state, state.version())))
+            del state
+        self.assertEqual(results, [(x, x) for x in range(50)])
+
     def test_repr_includes_state(self):
         self.state.set('a', 1)
         r = repr(self.state)
@@ -1,5 +1,9 @@
 import unittest
-from core.goalModule import Goal, linear_urgency, curiosity_utility, safety_utility
+from core.goalModule import (
+    Goal, ConstantUtilityGoal, linear_urgency, curiosity_utility, safety_utility,
+    URGENCY_SENSITIVE_BIT, RISK_AVERSE_BIT, EXPLORATORY_BIT
+)
+from core.shared_types import EXPLORATORY, RISK_AVERSE, Trait, TraitSet
 
 
 class TestGoalSystem(unittest.TestCase):
@@ -26,14 +30,110 @@ class TestGoalSystem(unittest.TestCase):
         expected = master.urgency(self.t)*0.5*1.0 + ev_g1 + ev_g2
         self.assertAlmostEqual(ev_master, expected)
 
+    def test_constant_utility_goal_matches_lambda_goal(self):
+        for traits in (None, [EXPLORATORY]):
+            const = ConstantUtilityGoal("Idle", 0.1, traits=traits)
+            lam = Goal("Idle", linear_urgency, lambda s: 0.1, traits=traits)
+            self.assertEqual(const.utility(self.state), lam.utility(self.state))
+            self.assertEqual(const.effective_value(0.25, self.state), lam.effective_value(0.25, self.state))
+
+    def test_trait_mask_follows_traits(self):
+        goal = Goal("G", linear_urgency, curiosity_utility, traits=[EXPLORATORY, Trait("OTHER", 1.0)])
+        self.assertEqual(goal._trait_mask, EXPLORATORY_BIT)
+        goal.traits = TraitSet([RISK_AVERSE])
+        self.assertEqual(goal._trait_mask, RISK_AVERSE_BIT)
+        self.assertFalse(goal._trait_mask & URGENCY_SENSITIVE_BIT)
+        self.assertAlmostEqual(goal.utility({"safety_level": 0.5, "novelty": 0.8}), 0.4)
+
+    def test_in_place_trait_edits_repack_mask(self):
+        goal = Goal("G", linear_urgency, curiosity_utility)
+        self.assertAlmostEqual(goal.utility(self.state), 0.8)
+        goal.traits.traits['EXPLORATORY'] = EXPLORATORY
+        self.assertAlmostEqual(goal.utility(self.state), 0.8 * 1.4)
+        goal.traits.traits.update({'RISK_AVERSE': RISK_AVERSE})
+        self.assertAlmostEqual(goal.utility({"novelty": 0.8, "safety_level": 0.5}), 0.8 * 1.4 * 0.5)
+        del goal.traits.traits['EXPLORATORY']
+        goal.traits.traits.pop('RISK_AVERSE')
+        self.assertEqual(goal._current_trait_mask(), 0)
+
+    def test_dependency_edits_recompile_plan(self):
+        g1 = Goal("G1", lambda t: 1.0, lambda s: 0.2)
+        g2 = Goal("G2", lambda t: 1.0, lambda s: 0.4)
+        master = Goal("Master", lambda t: 1.0, lambda s: 0.5, dependencies=[g1])
+        self.assertAlmostEqual(master.effective_value(self.t, self.state), 0.7)
+        master.dependencies.append(g2)
+        self.assertAlmostEqual(master.effective_value(self.t, self.state), 0.8)
+        g2.dependencies = [g1]
+        self.assertAlmostEqual(master.effective_value(self.t, self.state), 0.5 + (0.2 + 0.6) / 2)
+
+    def test_unrelated_edits_keep_compiled_plan(self):
+        g1 = Goal("G1", lambda t: 1.0, lambda s: 0.2)
+        master = Goal("Master", lambda t: 1.0, lambda s: 0.5, dependencies=[g1])
+        plan = master.compile()
+        other = Goal("Other", lambda t: 1.0, lambda s: 0.1, dependencies=[Goal("Leaf", lambda t: 1.0, lambda s: 0.3)])
+        other.dependencies.pop()
+        master.effective_value(self.t, self.state)
+        self.assertIs(master._plan, plan)
+        g1.dependencies.append(other)
+        master.effective_value(self.t, self.state)
+        self.assertIsNot(master._plan, plan)
+
+    def test_dependency_list_sort_accepts_keywords(self):
+        g1 = Goal("G1", lambda t: 1.0, lambda s: 0.2)
+        g2 = Goal("G2", lambda t: 1.0, lambda s: 0.4)
+        master = Goal("Master", lambda t: 1.0, lambda s: 0.5, dependencies=[g1, g2])
+        self.assertAlmostEqual(master.effective_value(self.t, self.state), 0.8)
+        master.dependencies.sort(key=lambda g: -g.utility(self.state))
+        self.assertEqual([g.name for g in master.dependencies], ["G2", "G1"])
+        # Goals do not order, so reverse=True is exercised on a single dependency
+        g2.dependencies.append(g1)
+        g2.dependencies.sort(reverse=True)
+        self.assertEqual(g2.dependencies, [g1])
+        self.assertAlmostEqual(master.effective_value(self.t, self.state), 0.5 + (0.6 + 0.2) / 2)
+
+    def test_cyclic_dependencies_raise(self):
+        g1 = Goal("G1", lambda t: 1.0, lambda s: 0.2)
+        g2 = Goal("G2", lambda t: 1.0, lambda s: 0.4, dependencies=[g1])
+        g1.dependencies.append(g2)
+        for goal in (g1, g2):
+            with self.assertRaises(ValueError):
+                goal.effective_value(self.t, self.state)
+        with self.assertRaises(ValueError):
+            g1.describe(self.t, self.state)
+
+    def test_describe_evaluates_callables_once(self):
+        calls = []
+        goal = Goal("G", lambda t: calls.append("u") or 0.5, lambda s: calls.append("w") or 0.4,
+                    traits=[EXPLORATORY])
+        text = goal.describe(self.t, self.state)
+        self.assertEqual(sorted(calls), ["u", "w"])
+        self.assertIn(f"Total Effective Value: {goal.effective_value(self.t, self.state):.4f}", text)
+
+    def test_urgency_fn_called_once_per_time(self):
+        calls = []
+        goal = Goal("G", lambda t: calls.append(t) or 0.5, curiosity_utility, pure_urgency=True)
+        for t in (1.0, 1.0, 2.0, 2.0):
+            goal.urgency(t)
+            goal.effective_value(t, self.state)
+        self.assertEqual(calls, [1.0, 2.0])
+        goal.urgency_fn = lambda t: 0.25
+        self.assertEqual(goal.urgency(2.0), 0.25)
+
+    def test_impure_urgency_fn_not_cached(self):
+        level = {"u": 0.2}
+        goal = Goal("G", lambda t: level["u"], curiosity_utility)
+        self.assertEqual(goal.urgency(1.0), 0.2)
+        level["u"] = 0.9
+        self.assertEqual(goal.urgency(1.0), 0.9)
+
     def test_cycle_detection(self):
         g1 = Goal("G1", linear_urgency, curiosity_utility)
         g2 = Goal("G2", linear_urgency, safety_utility, dependencies=[g1])
         g1.dependencies.append(g2)  # introduce cycle G1 <-> G2
 
-        ev = g1.effective_value(self.t, self.state)
-        # Should not infinite loop, just return sum without double-counting
-        self.assertTrue(ev > 0)
+        # Should not infinite loop: the cycle is reported instead
+        with self.assertRaises(ValueError):
+            g1.effective_value(self.t, self.state)
 
 if __name__ == "__main__":
     unittest.main()
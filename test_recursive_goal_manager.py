@@ -1,6 +1,7 @@
 import unittest
 from core.goalModule import Goal
 from core.arbitrator import GoalArbitrator
+import core.RecursiveGoalManager as rgm
 
 class TestGoalArbitrator(unittest.TestCase):
 
@@ -32,11 +33,140 @@ class TestGoalArbitrator(unittest.TestCase):
         self.assertIn(selected, [self.g1, self.g2])
         self.assertIsInstance(selected, Goal)
 
+    def test_two_goal_select_keeps_arbitrator_goals(self):
+        arb = GoalArbitrator([self.g1, self.g2, self.g3], mode='lyapunov')
+        arb.lyapunov_arbitrate(self.t, self.state)
+        history = list(arb._previous_values)
+        self.assertIs(arb.select({self.g1: 10.0, self.g2: 20.0}), self.g2)
+        self.assertEqual(arb.goals, (self.g1, self.g2, self.g3))
+        self.assertEqual(arb._previous_values, history)
+        self.assertIs(arb.get_goal('g3'), self.g3)
+
     def test_select_goal_with_empty_dict_returns_none(self):
         arb = GoalArbitrator()
         selected = arb.select({})
         self.assertIsNone(selected)
 
 
+class TestRecursiveGoalManager(unittest.TestCase):
+
+    def setUp(self):
+        self.state = {"hunger": 0.9, "food_aversion": 0.0, "affection": 0.5, "social_anxiety": 0.0}
+
+    def test_softmax_step_values(self):
+        mgr = rgm.build_example_manager()
+        values = [mgr.step(1.0, self.state) for _ in range(3)]
+        expected = [0.3877488101814029, 0.4061366765180476, 0.43031629726852527]
+        for value, exp in zip(values, expected):
+            self.assertAlmostEqual(value, exp)
+
+    def test_max_step_follows_best_subgoal(self):
+        mgr = rgm.build_example_manager()
+        mgr.arbitrator = rgm.GoalArbitrator(mode='max')
+        self.assertAlmostEqual(mgr.step(1.0, self.state), 0.5)
+
+    def test_manager_arbitrator_select_by_position(self):
+        values = [0.1, 0.5, 0.3]
+        positions, weights = rgm.GoalArbitrator(mode='max').select(values)
+        self.assertEqual((list(positions), list(weights)), ([1], [1.0]))
+        positions, weights = rgm.GoalArbitrator(mode='softmax').select(values)
+        self.assertEqual(list(positions), [0, 1, 2])
+        self.assertAlmostEqual(sum(weights), 1.0)
+        self.assertEqual(weights.index(max(weights)), 1)
+        self.assertEqual(rgm.GoalArbitrator().select([]), ((), ()))
+
+    def test_unstable_softmax_matches_stable_for_bounded_values(self):
+        values = [0.1, 2.5, 1.3, 0.7]
+        for temperature in (1.0, 0.5):
+            _, stable = rgm.GoalArbitrator(temperature=temperature).select(values)
+            _, unstable = rgm.GoalArbitrator(temperature=temperature, stable=False).select(values)
+            for a, b in zip(stable, unstable):
+                self.assertAlmostEqual(a, b)
+
+    def test_each_goal_evaluated_once_per_step(self):
+        calls = []
+
+        class CountingGoal(rgm.SocialBondingGoal):
+            def evaluate(self, t, state):
+                calls.append(self.name)
+                return super().evaluate(t, state)
+
+        root = rgm.Goal("Root")
+        root.subgoals = [CountingGoal("A"), CountingGoal("B")]
+        mgr = rgm.RecursiveGoalManager(root, rgm.GoalArbitrator())
+        mgr.step(1.0, self.state)
+        self.assertEqual(sorted(calls), ["A", "B"])
+
+    def test_max_mode_evaluates_selected_path_only(self):
+        calls = []
+
+        class CountingGoal(rgm.SocialBondingGoal):
+            def evaluate(self, t, state):
+                calls.append(self.name)
+                return self.level
+
+        def build(name, level, depth):
+            goal = CountingGoal(name)
+            goal.level = level
+            if depth:
+                goal.subgoals = [build(f"{name}.{i}", level + i, depth - 1) for i in range(4)]
+            return goal
+
+        root = rgm.Goal("Root")
+        root.subgoals = build("N", 0, 3).subgoals
+        mgr = rgm.RecursiveGoalManager(root, rgm.GoalArbitrator(mode='max'))
+        # Three levels of four subgoals each, always picking the last one
+        self.assertEqual(mgr.step(1.0, self.state), 9)
+        self.assertEqual(len(calls), 12)
+        self.assertEqual(calls[-4:], ["N.3.3.0", "N.3.3.1", "N.3.3.2", "N.3.3.3"])
+
+    def test_evaluate_batch_matches_evaluate(self):
+        state = {"hunger": 0.7, "food_aversion": 0.2, "affection": 0.8, "social_anxiety": 0.4}
+        for cls in (rgm.EatFoodGoal, rgm.SocialBondingGoal):
+            goals = [cls("A"), cls("B")]
+            for t in (0.0, 3.5, 12.0):
+                self.assertEqual(cls.evaluate_batch(goals, t, state),
+                                 [g.evaluate(t, state) for g in goals])
+
+    def test_deep_hierarchy_does_not_recurse(self):
+        root = rgm.Goal("Root")
+        node = root
+        for i in range(3000):
+            child = rgm.SocialBondingGoal(f"G{i}")
+            node.subgoals = [child]
+            node = child
+        node.subgoals = [rgm.EatFoodGoal("Eat")]
+        mgr = rgm.RecursiveGoalManager(root, rgm.GoalArbitrator(mode='max'))
+        mgr.t = 9.0
+        self.assertAlmostEqual(mgr.step(1.0, self.state), 0.9)
+
+    def test_inject_goal_rebuilds_traversal(self):
+        mgr = rgm.build_example_manager()
+        mgr.arbitrator = rgm.GoalArbitrator(mode='max')
+        mgr.step(1.0, self.state)
+        mgr.inject_goal(rgm.EatFoodGoal("EatMore"), parent=mgr.root_goal.subgoals[1])
+        mgr.reset()
+        self.assertAlmostEqual(mgr.step(10.0, self.state), 0.9)
+
+    def test_direct_subgoal_edits_rebuild_traversal(self):
+        def fresh_value(mgr):
+            fresh = rgm.RecursiveGoalManager(mgr.root_goal, mgr.arbitrator)
+            fresh.t = mgr.t
+            return fresh.step(0.0, self.state)
+
+        for mode in ('max', 'softmax'):
+            mgr = rgm.build_example_manager()
+            mgr.arbitrator = rgm.GoalArbitrator(mode=mode)
+            mgr.step(10.0, self.state)
+            eat, bond = mgr.root_goal.subgoals
+            bond.subgoals.append(rgm.EatFoodGoal("EatMore"))
+            self.assertAlmostEqual(mgr.step(0.0, self.state), fresh_value(mgr))
+            eat.subgoals = [rgm.SocialBondingGoal("Bond2")]
+            self.assertAlmostEqual(mgr.step(0.0, self.state), fresh_value(mgr))
+            mgr.root_goal.subgoals.pop()
+            self.assertAlmostEqual(mgr.step(0.0, self.state), 0.5)
+            mgr.root_goal = rgm.EatFoodGoal("Eat")
+            self.assertAlmostEqual(mgr.step(0.0, self.state), 0.9)
+
 if __name__ == "__main__":
     unittest.main()
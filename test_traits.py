@@ -0,0 +1,100 @@
+import unittest
+from core.goalModule import Goal
+from core.traits import (
+    GreedyTrait, DependencyAmplifierTrait, TimeDecayTrait, StateBoostTrait,
+    EntropicStabilizerTrait, RecursiveRewardTrait, UrgencyClamperTrait, TraitStack
+)
+
+
+class TestTraitStack(unittest.TestCase):
+
+    def setUp(self):
+        self.goal = Goal("Forage", lambda t: 0.7, lambda s: 0.4)
+        self.state = {
+            "energy": 0.9,
+            "volatility": {"Forage": 0.3},
+            "success_history": {"Forage": 4},
+        }
+        self.kwargs = dict(base=0.28, urgency=0.7, utility=0.4, dependencies=[],
+                           dep_value=0.5, state=self.state, goal=self.goal, t=3.0)
+
+    def test_folded_modify_matches_trait_sum(self):
+        traits = [
+            GreedyTrait(), DependencyAmplifierTrait(), TimeDecayTrait(),
+            StateBoostTrait("energy", 0.8, 0.25), StateBoostTrait("energy", 0.95, 1.0),
+            EntropicStabilizerTrait(), RecursiveRewardTrait(), GreedyTrait(),
+        ]
+        expected = sum(trait.modify(**self.kwargs) for trait in traits)
+        self.assertAlmostEqual(TraitStack(traits).modify(**self.kwargs), expected)
+
+    def test_state_lookups_see_in_place_updates(self):
+        stack = TraitStack([EntropicStabilizerTrait(), RecursiveRewardTrait()])
+        stack.modify(**self.kwargs)
+        self.state["volatility"] = {"Forage": 5.0}
+        self.state["success_history"] = {}
+        self.assertAlmostEqual(stack.modify(**self.kwargs), -0.5)
+
+    def test_subclass_overrides_are_not_folded(self):
+        class DoubleGreedy(GreedyTrait):
+            def modify(self, **kwargs):
+                return 2 * super().modify(**kwargs)
+
+        stack = TraitStack([DoubleGreedy()])
+        self.assertAlmostEqual(stack.modify(**self.kwargs), 2 * GreedyTrait().modify(**self.kwargs))
+        stack.traits = []
+        self.assertEqual(stack.modify(**self.kwargs), 0.0)
+
+    def test_in_place_edits_refold(self):
+        boost = StateBoostTrait("energy", 0.95, 0.25)
+        stack = TraitStack([boost])
+        self.assertEqual(stack.modify(**self.kwargs), 0.0)
+        boost.threshold = 0.8
+        self.assertEqual(stack.modify(**self.kwargs), 0.25)
+        stack.traits.append(GreedyTrait())
+        stack.traits += [DependencyAmplifierTrait()]
+        expected = sum(trait.modify(**self.kwargs) for trait in stack.traits)
+        self.assertAlmostEqual(stack.modify(**self.kwargs), expected)
+        del stack.traits[0]
+        stack.traits.pop()
+        self.assertAlmostEqual(stack.modify(**self.kwargs), GreedyTrait().modify(**self.kwargs))
+
+    def test_sort_accepts_keywords_and_refolds(self):
+        stack = TraitStack([TimeDecayTrait(), UrgencyClamperTrait()])
+        self.assertAlmostEqual(stack.adjust_urgency(2.0, t=1.0, goal=self.goal), 1.0)
+        stack.traits.sort(key=lambda trait: type(trait).__name__, reverse=True)
+        self.assertIsInstance(stack.traits[0], UrgencyClamperTrait)
+        self.assertAlmostEqual(stack.adjust_urgency(2.0, t=1.0, goal=self.goal), 0.95)
+        # Traits do not order, so reverse=True is exercised on a single trait
+        single = TraitStack([GreedyTrait()])
+        single.traits.sort(reverse=True)
+        self.assertAlmostEqual(single.modify(**self.kwargs), GreedyTrait().modify(**self.kwargs))
+
+    def test_builtin_traits_have_no_instance_dict(self):
+        for trait in [GreedyTrait(), TimeDecayTrait(), StateBoostTrait("energy", 0.8, 0.25), TraitStack([])]:
+            self.assertFalse(hasattr(trait, '__dict__'), type(trait).__name__)
+
+    def test_time_decay_incremental_matches_pow(self):
+        decay = TimeDecayTrait()
+        for t in [0, 1, 2, 3, 3, 10, 11, 2.5, 3.5, 0]:
+            self.assertAlmostEqual(decay.adjust_urgency(0.8, t=t, goal=self.goal), 0.8 * 0.95 ** t, places=12)
+
+    def test_adjustments_chain_in_order(self):
+        class HalveUtility(GreedyTrait):
+            def adjust_utility(self, base_utility, *, state, goal):
+                return base_utility / 2
+
+        stack = TraitStack([TimeDecayTrait(), GreedyTrait(), TimeDecayTrait(), HalveUtility()])
+        self.assertEqual(stack._urgency_adjusters, (stack.traits[0].adjust_urgency, stack.traits[2].adjust_urgency))
+        self.assertEqual(stack._utility_adjusters, (stack.traits[3].adjust_utility,))
+        self.assertAlmostEqual(stack.adjust_urgency(1.0, t=2.0, goal=self.goal), 0.95 ** 4)
+        self.assertEqual(stack.adjust_utility(0.4, state=self.state, goal=self.goal), 0.2)
+
+    def test_urgency_clamper_is_instantiable(self):
+        clamper = UrgencyClamperTrait()
+        self.assertEqual(clamper.adjust_urgency(1.4, t=2.0, goal=self.goal), 1.0)
+        self.assertEqual(clamper.adjust_urgency(0.7, t=2.0, goal=self.goal), 0.7)
+        self.assertEqual(clamper.modify(**self.kwargs), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
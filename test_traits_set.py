@@ -0,0 +1,31 @@
+import unittest
+from core.TraitsSet import Trait, TraitSet
+
+
+class TestTraitSet(unittest.TestCase):
+
+    def test_membership(self):
+        traits = TraitSet([Trait.RISK_AVERSE, Trait.EXPLORATORY])
+        self.assertTrue(traits.has_trait(Trait.RISK_AVERSE))
+        self.assertTrue(traits.has_trait(Trait.EXPLORATORY))
+        self.assertFalse(traits.has_trait(Trait.URGENCY_SENSITIVE))
+        self.assertEqual(traits.traits, frozenset({Trait.RISK_AVERSE, Trait.EXPLORATORY}))
+
+    def test_add_and_remove_return_new_sets(self):
+        base = TraitSet()
+        added = base.add_trait(Trait.DEPENDENCY_CRITICAL)
+        self.assertFalse(base.has_trait(Trait.DEPENDENCY_CRITICAL))
+        self.assertTrue(added.has_trait(Trait.DEPENDENCY_CRITICAL))
+        self.assertEqual(added.remove_trait(Trait.DEPENDENCY_CRITICAL), base)
+        self.assertEqual(base.remove_trait(Trait.RISK_AVERSE), base)
+
+    def test_equality_and_hash(self):
+        a = TraitSet([Trait.URGENCY_SENSITIVE, Trait.RISK_AVERSE])
+        b = TraitSet([Trait.RISK_AVERSE]).add_trait(Trait.URGENCY_SENSITIVE)
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(repr(a), "TraitSet(['RISK_AVERSE', 'URGENCY_SENSITIVE'])")
+
+
+if __name__ == "__main__":
+    unittest.main()